@@ -0,0 +1,10 @@
+# Benchmarks for pylgrim:
+#   * bench_import to measure the time it takes to import pylgrim and its submodules.
+#   * generators with seeded, reproducible random, grid and Solomon-style instances.
+#   * bench_solvers to time preprocess, GSSA and DLA over a sweep of generated instances, writing JSON lines.
+#   * compare to compare the results of bench_solvers between two commits.
+#
+# Run a benchmark from the root of the repository, e.g. `python -m benchmarks.bench_import`.
+#
+# Author:
+#   Toon Weyens
@@ -0,0 +1,72 @@
+# Import-time benchmark for pylgrim.
+# Every import is timed in a fresh interpreter, so that nothing is cached in sys.modules.
+#
+# Usage:
+#   python -m benchmarks.bench_import [--repeat N] [--json]
+#
+# Author:
+#   Toon Weyens
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# statements to time, from light to heavy
+STATEMENTS = {
+    'pylgrim': 'import pylgrim',
+    'pylgrim.ESPP': 'import pylgrim.ESPP',
+    'pylgrim.ESPPRC': 'import pylgrim.ESPPRC',
+}
+
+# heavy dependencies of which we report whether they were imported
+HEAVY_MODULES = ('networkx', 'numpy')
+
+_TIMER = """
+import json, sys, time, logging
+t0 = time.perf_counter()
+{statement}
+t1 = time.perf_counter()
+print(json.dumps({{'seconds': t1 - t0, 'loaded': [m for m in {heavy} if m in sys.modules], 'root_handlers': len(logging.getLogger().handlers)}}))
+"""
+
+def time_import(statement, repeat=5):
+    """Time the import statement {statement} in {repeat} fresh interpreters.
+    Returns a dictionary with the timings in seconds and the heavy modules that were loaded."""
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = root + os.pathsep + env.get('PYTHONPATH', '')
+    code = _TIMER.format(statement=statement, heavy=list(HEAVY_MODULES))
+    
+    seconds = list()
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout
+        result = json.loads(out)
+        seconds.append(result['seconds'])
+    
+    return {
+        'statement': statement,
+        'min': min(seconds),
+        'median': statistics.median(seconds),
+        'loaded': result['loaded'],
+        'root_handlers': result['root_handlers'],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the import time of pylgrim.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of fresh interpreters per statement')
+    parser.add_argument('--json', action='store_true', help='print results as JSON lines')
+    args = parser.parse_args(argv)
+    
+    for name, statement in STATEMENTS.items():
+        result = time_import(statement, repeat=args.repeat)
+        if args.json:
+            print(json.dumps(dict(name=name, **result)))
+        else:
+            print('{:<16} min {:7.2f} ms  median {:7.2f} ms  loaded: {}'.format(
+                name, 1e3*result['min'], 1e3*result['median'], ', '.join(result['loaded']) or '-'))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Solver benchmark for pylgrim.
+# Sweeps generated instances over generator, node count, density, number of resources and resource tightness, and times ESPPRC.preprocess, ESPPRC.GSSA and ESPP.DLA on each of them.
+# Every run is written as one JSON line, together with the git commit, so that results of different commits can be compared with benchmarks.compare.
+#
+# Usage:
+#   python -m benchmarks.bench_solvers [--generators random grid solomon] [--nodes 10 20] [--density 0.2] [--n-res 1 2]
+#                                      [--tightness 0.5 1.0] [--seeds 0 1] [--solvers preprocess GSSA DLA] [--output FILE]
+#
+# Author:
+#   Toon Weyens
+
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from pylgrim import ESPP, ESPPRC
+from pylgrim.stats import SolverStats
+from .generators import GENERATORS
+
+SOLVERS = ('preprocess', 'GSSA', 'DLA')
+
+def git_commit():
+    """Current git commit of the repository, or None if unknown."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _summary(stats):
+    """Statistics {stats} as a dictionary that can be written as JSON, with K summarized by its maximum and sum."""
+    summary = stats.as_dict()
+    K = summary.pop('K')
+    summary['K_max'] = max(K.values(), default=0)
+    summary['K_sum'] = sum(K.values())
+    summary['S'] = [str(n) for n in summary['S']]
+    summary['labels_pruned'] = {str(k): v for k, v in summary['labels_pruned'].items()}
+    return summary
+
+def run_instance(generator, n_nodes, density, n_res, tightness, seed, solvers=SOLVERS):
+    """Generate one instance and time the solvers {solvers} on it.
+    GSSA needs preprocess, which is then always run.
+    Returns a list with a result dictionary per solver."""
+    G, source, target, max_res = GENERATORS[generator](n_nodes, density=density, n_res=n_res, tightness=tightness, seed=seed)
+    case = dict(generator=generator, n_nodes=n_nodes, density=density, n_res=n_res, tightness=tightness, seed=seed,
+                graph_nodes=G.number_of_nodes(), graph_edges=G.number_of_edges())
+    results = list()
+
+    if 'preprocess' in solvers or 'GSSA' in solvers:
+        stats = SolverStats()
+        t0 = time.perf_counter()
+        H, res_min = ESPPRC.preprocess(G, source, target, max_res, stats=stats)
+        seconds = time.perf_counter() - t0
+        if 'preprocess' in solvers:
+            results.append(dict(case, solver='preprocess', seconds=seconds, cost=None, stats=_summary(stats)))
+
+        if 'GSSA' in solvers:
+            stats = SolverStats()
+            t0 = time.perf_counter()
+            path, label = ESPPRC.GSSA(H, source, target, max_res, res_min, stats=stats)
+            seconds = time.perf_counter() - t0
+            results.append(dict(case, solver='GSSA', seconds=seconds, cost=float(label[0]), stats=_summary(stats)))
+
+    if 'DLA' in solvers:
+        stats = SolverStats()
+        t0 = time.perf_counter()
+        paths, costs = ESPP.DLA(G, source, stats=stats)
+        seconds = time.perf_counter() - t0
+        results.append(dict(case, solver='DLA', seconds=seconds, cost=float(costs[target][0]), stats=_summary(stats)))
+
+    return results
+
+def sweep(generators, nodes, densities, n_ress, tightnesses, seeds, solvers=SOLVERS):
+    """Run all combinations of the parameters, yielding the result dictionaries one by one."""
+    for params in itertools.product(generators, nodes, densities, n_ress, tightnesses, seeds):
+        yield from run_instance(*params, solvers=solvers)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark pylgrim solvers on generated instances.')
+    parser.add_argument('--generators', nargs='+', default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument('--nodes', nargs='+', type=int, default=[10, 15])
+    parser.add_argument('--density', nargs='+', type=float, default=[0.3])
+    parser.add_argument('--n-res', nargs='+', type=int, default=[1, 2])
+    parser.add_argument('--tightness', nargs='+', type=float, default=[0.3, 0.6])
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0])
+    parser.add_argument('--solvers', nargs='+', default=list(SOLVERS), choices=SOLVERS)
+    parser.add_argument('--output', default=None, help='JSON lines file to append the results to (default: stdout)')
+    args = parser.parse_args(argv)
+
+    meta = dict(commit=git_commit(), python=platform.python_version())
+    out = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        for result in sweep(args.generators, args.nodes, args.density, args.n_res, args.tightness, args.seeds, solvers=args.solvers):
+            out.write(json.dumps(dict(meta, **result)) + '\n')
+            out.flush()
+            if args.output:
+                print('{generator:>8} n={n_nodes:<4} d={density:<4} r={n_res} t={tightness:<4} seed={seed:<3} {solver:>10}: {seconds:9.4f} s'.format(**result))
+    finally:
+        if args.output:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Compare two result files of benchmarks.bench_solvers, e.g. of two commits.
+# Runs are matched on generator, parameters, seed and solver; the time ratio new/old is printed for each of them, and a warning if the cost differs.
+#
+# Usage:
+#   python -m benchmarks.compare OLD.jsonl NEW.jsonl [--threshold 1.2]
+#
+# Author:
+#   Toon Weyens
+
+import argparse
+import json
+
+KEY = ('generator', 'n_nodes', 'density', 'n_res', 'tightness', 'seed', 'solver')
+
+def load(filename):
+    """Load a JSON lines result file into a dictionary keyed by run, keeping the last result of each run."""
+    results = dict()
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                result = json.loads(line)
+                results[tuple(result[k] for k in KEY)] = result
+    return results
+
+def compare(old, new, threshold=1.2):
+    """Compare result dictionaries {old} and {new}.
+    Returns a list of (key, old seconds, new seconds, ratio, flag), where flag marks regressions slower than {threshold} and changed costs."""
+    rows = list()
+    for key in sorted(set(old) & set(new), key=str):
+        t_old, t_new = old[key]['seconds'], new[key]['seconds']
+        ratio = t_new / t_old if t_old > 0 else float('inf')
+        flag = ''
+        if ratio > threshold:
+            flag = 'SLOWER'
+        cost_old, cost_new = old[key]['cost'], new[key]['cost']
+        if cost_old is not None and cost_new is not None and abs(cost_old - cost_new) > 1e-9 * max(1.0, abs(cost_old)):
+            flag = (flag + ' COST').strip()
+        rows.append((key, t_old, t_new, ratio, flag))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two pylgrim benchmark result files.')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=1.2, help='ratio new/old above which a run is flagged as slower')
+    args = parser.parse_args(argv)
+
+    rows = compare(load(args.old), load(args.new), threshold=args.threshold)
+    for key, t_old, t_new, ratio, flag in rows:
+        print('{:<60} {:9.4f} s -> {:9.4f} s  x{:6.2f}  {}'.format(' '.join(str(k) for k in key), t_old, t_new, ratio, flag))
+
+if __name__ == "__main__":
+    main()
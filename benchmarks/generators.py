@@ -0,0 +1,119 @@
+# Seeded, reproducible instance generators for the pylgrim benchmarks.
+# Every generator returns a tuple (G, source, target, max_res), where the source of G has no in-edges, so that it can be passed directly to ESPPRC.preprocess and ESPP.DLA.
+#   * random_graph: random directed graph with uniform weights in [-1, 1] and therefore many negative cycles.
+#   * grid_graph: grid-like routing graph with prizes on the nodes, travel time as first resource.
+#   * solomon_graph: Solomon-style customer graph with a depot, demands, travel times and prizes (dual prices).
+# The arguments are the same for all generators:
+#   * n_nodes: number of nodes
+#   * density: fraction of candidate arcs that is kept
+#   * n_res: number of resources
+#   * tightness: fraction (0, 1] of the resource needed to visit all nodes that is available
+#     (but never less than needed for the path with the fewest arcs, so that every instance is feasible)
+#   * seed: random seed
+#
+# Author:
+#   Toon Weyens
+
+import math
+import random
+import networkx as nx
+import numpy as np
+
+def random_graph(n_nodes, density=0.2, n_res=1, tightness=0.5, seed=0):
+    """Random directed graph of {n_nodes} nodes, where each arc exists with probability {density}.
+    The weights are uniform in [-1, 1], so that there are many negative cost cycles, and the resources are uniform in [0.5, 1.5].
+    The source is node 0 and the target node {n_nodes}-1."""
+    rng = random.Random(seed)
+    G = nx.gnp_random_graph(n_nodes, density, directed=True, seed=seed)
+    G.graph['n_res'] = n_res
+    source, target = 0, n_nodes-1
+    G.remove_edges_from(list(G.in_edges(source)))
+    G.remove_edges_from(list(G.out_edges(target)))
+
+    # make sure that there is at least one path from source to target
+    for u, v in zip(range(0, n_nodes-1), range(1, n_nodes)):
+        if not nx.has_path(G, source, target):
+            G.add_edge(u, v)
+
+    for u, v in sorted(G.edges()):
+        G[u][v]['weight'] = rng.uniform(-1.0, 1.0)
+        G[u][v]['res_cost'] = np.array([rng.uniform(0.5, 1.5) for _ in range(n_res)])
+
+    max_res = np.full(n_res, tightness*n_nodes)
+    return G, source, target, _feasible_max_res(G, source, target, max_res)
+
+def grid_graph(n_nodes, density=0.5, n_res=1, tightness=0.5, seed=0):
+    """Grid-like routing graph of about {n_nodes} nodes, with arcs in both directions between neighbours and diagonal arcs with probability {density}.
+    The first resource is the travel time, the others random loads of the node that is entered.
+    The weight is the travel time minus a random prize for the node that is entered, so that cycles through rich nodes are negative.
+    The source is the bottom-left and the target the top-right corner."""
+    rng = random.Random(seed)
+    side = max(2, math.ceil(math.sqrt(n_nodes)))
+    prize = {(i, j): rng.uniform(0.0, 2.5) for i in range(side) for j in range(side)}
+    load = {(i, j): [rng.uniform(0.0, 1.0) for _ in range(n_res-1)] for i in range(side) for j in range(side)}
+    source, target = (0, 0), (side-1, side-1)
+
+    G = nx.DiGraph(n_res=n_res)
+    for i in range(side):
+        for j in range(side):
+            for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)):
+                v = (i+di, j+dj)
+                if v not in prize or v == source or (i, j) == target:
+                    continue
+                if di != 0 and dj != 0 and rng.random() >= density:
+                    continue
+                time = math.hypot(di, dj)
+                G.add_edge((i, j), v, weight=time-prize[v], res_cost=np.array([time] + load[v]))
+
+    max_res = np.concatenate(([tightness*2*side*side], np.full(n_res-1, tightness*side*side/2)))
+    return G, source, target, _feasible_max_res(G, source, target, max_res)
+
+def solomon_graph(n_nodes, density=0.5, n_res=2, tightness=0.5, seed=0):
+    """Solomon-style customer graph with a depot and {n_nodes}-2 customers at random positions in a 100 x 100 square.
+    Each customer is connected to the fraction {density} of the other customers that is closest to it.
+    The first resource is the travel time (distance plus service time), the second the demand of the customer that is entered and the others random loads.
+    The weight is the distance minus a random dual price for the customer that is entered, as in the pricing problem of vehicle routing.
+    The source is the depot 'depot' and the target its copy 'sink'."""
+    rng = random.Random(seed)
+    n_customers = max(1, n_nodes-2)
+    pos = {c: (rng.uniform(0, 100), rng.uniform(0, 100)) for c in range(n_customers)}
+    pos['depot'] = pos['sink'] = (50.0, 50.0)
+    demand = {c: rng.randint(1, 30) for c in range(n_customers)}
+    dual = {c: rng.uniform(0, 60) for c in range(n_customers)}
+    load = {c: [rng.uniform(0.0, 1.0) for _ in range(n_res-2)] for c in range(n_customers)}
+    service = 10.0
+    demand['sink'] = 0
+    dual['sink'] = 0.0
+    load['sink'] = [0.0] * max(0, n_res-2)
+
+    def dist(a, b):
+        return math.hypot(pos[a][0]-pos[b][0], pos[a][1]-pos[b][1])
+
+    def res_cost(a, b):
+        res = [dist(a, b) + service, demand[b]] + load[b]
+        return np.array(res[:n_res], dtype=float)
+
+    G = nx.DiGraph(n_res=n_res)
+    n_neighbors = max(1, round(density*(n_customers-1)))
+    for c in range(n_customers):
+        G.add_edge('depot', c, weight=dist('depot', c)-dual[c], res_cost=res_cost('depot', c))
+        G.add_edge(c, 'sink', weight=dist(c, 'sink'), res_cost=res_cost(c, 'sink'))
+        neighbors = sorted((d for d in range(n_customers) if d != c), key=lambda d: dist(c, d))
+        for d in neighbors[:n_neighbors]:
+            G.add_edge(c, d, weight=dist(c, d)-dual[d], res_cost=res_cost(c, d))
+
+    # to visit all customers, about n_customers * (mean distance + service) time and the total demand are needed
+    max_res = [tightness*n_customers*(52.0+service), tightness*sum(demand.values())] + [tightness*n_customers/2]*(n_res-2)
+    return G, 'depot', 'sink', _feasible_max_res(G, 'depot', 'sink', np.array(max_res[:n_res], dtype=float))
+
+def _feasible_max_res(G, source, target, max_res):
+    """Raise the maximum resources {max_res} where needed so that the path with the fewest arcs from {source} to {target} is feasible."""
+    path = nx.shortest_path(G, source, target)
+    res_path = sum(np.asarray(G[u][v]['res_cost'], dtype=float) for u, v in zip(path[:-1], path[1:]))
+    return np.maximum(max_res, res_path)
+
+GENERATORS = {
+    'random': random_graph,
+    'grid': grid_graph,
+    'solomon': solomon_graph,
+}
@@ -4,6 +4,7 @@
 #   * single source / all targets
 #   * no resources
 #   * elementary paths are sought by requesting more and more paths for nodes which have been found to form part of a NCC (negative cost cycle), when there is no alternative.
+#   * the paths of each node are stored in a trie.PathTrie, in which they share their prefixes, so that the memory does not grow with K times the path length.
 ##
 # Author:
 #   Toon Weyens
@@ -12,59 +13,74 @@
 #   [1]: "On the shortest path problem with negative cost cycles" by Di Puglia Pugliese, Luigi (DOI: 10.1007/s10589-015-9773-1)
 from collections import deque, OrderedDict
 import logging
+import time
+import networkx as nx
 from . import tools as pt
 from . import path as pth
-
-# logging.basicConfig(level=logging.DEBUG)
-logging.basicConfig(level=logging.WARNING)
-logging.getLogger("matplotlib").setLevel(logging.INFO)
-logging.getLogger("matplotlib.font_manager").setLevel(logging.INFO)
+from . import trie as ptr
 
 logger = logging.getLogger(__name__)
 
 
 
-def TLAdynK(G, source, K, L, paths=None, costs=None):
+def TLAdynK(G, source, K, L, paths=None, costs=None, stats=None, cancel=None, trie=None):
     """Truncated labelling algorithm for dynamic kSPP
-    (based on algorithm 3 from [1])"""
+    (based on algorithm 3 from [1])
+    The paths are entries of the trie.PathTrie {trie}, in which they share their prefixes. Pass the same trie with the {paths} of a previous call, and use it to read the paths.
+    Optionally, the statistics {stats} are updated, and the algorithm raises tools.Cancelled when the tools.CancelToken {cancel} is cancelled."""
     
     inf = float('inf')
+    t0 = time.perf_counter()
+    debug = logger.isEnabledFor(logging.DEBUG)
 
     # 1. Initialization
+    if trie is None:
+        trie = ptr.PathTrie()
     if paths is None or costs is None:
-        paths = {n: [None] * K[n] for n in G.nodes()}
-        costs = {n: [inf] * K[n] for n in G.nodes()}
-        paths[source][0] = [source]
+        paths = {n: [None] * K[n] for n in G}
+        costs = {n: [inf] * K[n] for n in G}
+        paths[source][0] = trie.root(source)
         costs[source][0] = 0
 
     L_q = deque(L)
 
+    # number of paths stored and the size of the trie, for statistics
+    if stats is not None:
+        n_paths_tot = 0
+        for n in paths:
+            for path in paths[n]:
+                if path is not None:
+                    n_paths_tot += 1
+        stats.update_peak(n_paths_tot, trie.nbytes)
+
     # 2. main loop for selected node
     while L_q:
+        if cancel is not None:
+            cancel.check()
+
         # select element FIFO
         u = L_q.popleft()
         L.remove(u)
-        logger.debug(f'  Popping element {u} with current paths')
-        for n in range(K[u]):
-            if paths[u][n] is None:
-                break
-            logger.debug(f'    {n}: {pt.print_path(paths[u][n])} ({costs[u][n]})')
+        if debug:
+            logger.debug(f'  Popping element {u} with current paths')
+            for n in range(K[u]):
+                if paths[u][n] is None:
+                    break
+                logger.debug(f'    {n}: {pt.print_path(trie.nodes(paths[u][n]))} ({costs[u][n]})')
 
         # extend label for each child
         for v, e in G.succ[u].items():
-            logger.debug(f'    treating extension to {v}, weight = {e["weight"]} with current paths:')
-            for n in range(K[v]):
-                if paths[v][n] is None:
-                    break
-                logger.debug(f'      {n}: {pt.print_path(paths[v][n])} ({costs[v][n]})')
-            logger.debug('')
+            if debug:
+                logger.debug(f'    treating extension to {v}, weight = {e["weight"]} with current paths:')
+                for n in range(K[v]):
+                    if paths[v][n] is None:
+                        break
+                    logger.debug(f'      {n}: {pt.print_path(trie.nodes(paths[v][n]))} ({costs[v][n]})')
+                logger.debug('')
 
             # error if the source is a child. The in-edges of the source need to be separated from the out-edges.
             if v == source:
-                log_str = 'ERROR: source cannot be a child'
-                print(log_str)
-                logger.critical(log_str)
-                quit()
+                raise nx.NetworkXError('source cannot be a child')
             
             # Set up check for NCC:
             #   1. Saturation check: We are out of memory for node u
@@ -92,7 +108,7 @@ def TLAdynK(G, source, K, L, paths=None, costs=None):
                 for ku in range(0,K[u]):
                     if paths[u][ku] is None: 
                         break
-                    if v not in paths[u][ku]:
+                    if not trie.contains(paths[u][ku], v):
                         # logger.debug('        {} not in {}'.format(v,pt.print_path(paths[u][ku])))
                         # logger.debug('          -> at least one elementary path {}'.format(ku))
                         NCC_conds[1] = False
@@ -102,16 +118,21 @@ def TLAdynK(G, source, K, L, paths=None, costs=None):
             # unavoidable NCC detected
             if all(NCC_conds):
                 # return all the nodes involved in the NCC
-                pos_v_in_u = paths[u][0].index(v)
-                NCC = paths[u][0][pos_v_in_u:]
+                path_u = trie.nodes(paths[u][0])
+                NCC = path_u[path_u.index(v):]
 
-                logger.debug(f'      unavoidable NCC found with nodes {NCC}:')             
+                if debug:
+                    logger.debug(f'      unavoidable NCC found with nodes {NCC}:')             
+                if stats is not None:
+                    stats.add_time('labeling', time.perf_counter() - t0)
+                    stats.finish('TLAdynK')
                 return paths, costs, NCC
                     
             else:
                 # Loop over all paths of u.
                 for ku in range(K[u]):
-                    logger.debug(f'      extending from path {ku} of node {u}')
+                    if debug:
+                        logger.debug(f'      extending from path {ku} of node {u}')
 
                     path_u = paths[u][ku]
                     if path_u is None: 
@@ -119,32 +140,48 @@ def TLAdynK(G, source, K, L, paths=None, costs=None):
                     cost_u = costs[u][ku]
 
                     # abandon this iteration if invalid path
-                    if v in path_u:
-                        logger.debug(f'        skipping extension to {v} as it creates a cycle')
+                    if trie.contains(path_u, v):
+                        if debug:
+                            logger.debug(f'        skipping extension to {v} as it creates a cycle')
+                        if stats is not None:
+                            stats.add_pruned('cycle')
                         continue
                                         
                     # Loop over all paths of v.
                     for kv in range(K[v]):
-                        path_v = paths[v][kv]
                         cost_v = costs[v][kv]
 
-                        path_v_new = list(path_u) # lists makes a shallow copy
-                        path_v_new.append(v)
+                        # the entry of the new path only exists if it is held already
+                        path_v_new = trie.find(path_u, v)
                         cost_v_new = cost_u + e['weight']
 
-                        if path_v_new in paths[v]:
+                        if path_v_new is not None and path_v_new in paths[v]:
                             continue # potential path already present in paths[v]
 
-                        logger.debug(f'        comparing potential new cost {cost_v_new} to cost {cost_v} of path {kv}')
+                        if debug:
+                            logger.debug(f'        comparing potential new cost {cost_v_new} to cost {cost_v} of path {kv}')
                         add_new_path = False
                         if cost_v_new < cost_v:
                             add_new_path = True
                         elif cost_v_new == cost_v:
-                            add_new_path = path_v_new != path_v # equal cost is OK if we have a new path
+                            add_new_path = True # equal cost is OK, as we have a new path
                             
                         if (add_new_path):
                             # insert new path and shift all next down as well
-                            logger.debug(f'          inserting path with cost {cost_v_new} in path[{v}] at position {kv}')
+                            if debug:
+                                logger.debug(f'          inserting path with cost {cost_v_new} in path[{v}] at position {kv}')
+                            path_v_new = trie.extend(path_u, v)
+                            if stats is not None:
+                                stats.labels_created += 1
+                                n_paths_tot += 1
+                                if paths[v][-1] is not None:
+                                    stats.labels_removed += 1
+                                    n_paths_tot -= 1
+                            # the last path drops out
+                            if paths[v][-1] is not None:
+                                trie.release(paths[v][-1])
+                            if stats is not None:
+                                stats.update_peak(n_paths_tot, trie.nbytes)
                             for kv2 in range(K[v]-1, kv, -1):
                                 costs[v][kv2] = costs[v][kv2-1]
                                 paths[v][kv2] = paths[v][kv2-1]
@@ -154,42 +191,81 @@ def TLAdynK(G, source, K, L, paths=None, costs=None):
 
                             # possibly add node v to L
                             if v not in L:
-                                logger.debug('          add node {} to set L'.format(v))
+                                if debug:
+                                    logger.debug('          add node {} to set L'.format(v))
                                 L.add(v)
                                 L_q.append(v)
+                                if stats is not None:
+                                    stats.max_open = max(stats.max_open, len(L))
                             
                             # skip all following kv to next path ku
                             break
                         else:
-                            logger.debug(f'          not inserting path with cost {cost_v_new} in path[{v}] at position {kv}')
+                            if debug:
+                                logger.debug(f'          not inserting path with cost {cost_v_new} in path[{v}] at position {kv}')
+                            if stats is not None and kv == K[v]-1:
+                                stats.labels_dominated += 1
 
             
-            logger.debug('    resulting paths to {}:'.format(v))
-            for n in range(0,len(paths[v])):
-                if paths[v][n] is None:
-                    break
-                logger.debug('      {}({})'.format(pt.print_path(paths[v][n]),costs[v][n]))
+            if debug:
+                logger.debug('    resulting paths to {}:'.format(v))
+                for n in range(0,len(paths[v])):
+                    if paths[v][n] is None:
+                        break
+                    logger.debug('      {}({})'.format(pt.print_path(trie.nodes(paths[v][n])),costs[v][n]))
+                logger.debug('')
+        if debug:
+            logger.debug('  {} elements in queue'.format(len(L)))
             logger.debug('')
-        logger.debug('  {} elements in queue'.format(len(L)))
-        logger.debug('')
         #print('  ------------------------------------------------------')
         #input("  Press Enter to continue...")
         #print('  ------------------------------------------------------')
         #print('')
     
+    if stats is not None:
+        stats.add_time('labeling', time.perf_counter() - t0)
+        stats.finish('TLAdynK')
+    
     return paths, costs, []
 
 
-def DLA(G, source, min_K=1, output_pos = False, log_summary=False, plot_K_updates=False):
+def DLA(G, source, min_K=1, output_pos = False, log_summary=False, plot_K_updates=False, stats=None, cancel=None):
     """Dynamic labelling algorithm
-    (based on algorithm 4 from [1])"""
+    (based on algorithm 4 from [1])
+    {G} can also be a compiled.CompiledGraph, set up directly from arrays.
+    Optionally, the statistics {stats} are updated, and the algorithm raises tools.Cancelled when the tools.CancelToken {cancel} is cancelled."""
     
+    t0 = time.perf_counter()
     logger.info('source: {}'.format(source))
+    
+    # the paths are stored in a trie, in which they share their prefixes
+    trie = ptr.PathTrie()
+    paths, costs, K = _dynamic_labelling(G, source, min_K, trie, output_pos=output_pos, log_summary=log_summary, plot_K_updates=plot_K_updates, stats=stats, cancel=cancel)
+
+    if stats is not None:
+        stats.K = dict(K)
+        stats.add_time('DLA', time.perf_counter() - t0)
+        stats.finish('DLA')
+
+    # return
+    rpaths = dict()
+    for node in paths:
+        rpaths[node] = list()
+        for path in paths[node]:
+            if path is not None:
+                rpaths[node].append(pth.Path(G, trie.nodes(path)))
+    return rpaths, costs
+
+def _dynamic_labelling(G, source, min_K, trie, output_pos=False, log_summary=False, plot_K_updates=False, stats=None, cancel=None):
+    """paths and costs of the dynamic labelling algorithm DLA
+    returns the paths, as entries of the trie.PathTrie {trie}, and costs for each node, and the number of paths K for each node"""
+    
+    debug = logger.isEnabledFor(logging.DEBUG)
     inf = float('inf')
     
     # initialize K label to minimal value and not done
     K = {}
-    for n in G.nodes():
+    for n in G:
         K[n] = min_K
 
     # we will store paths and costs accross different TLAdynK calls
@@ -202,17 +278,19 @@ def DLA(G, source, min_K=1, output_pos = False, log_summary=False, plot_K_update
     viz_lines = 0
 
     while not DLA_done:
-        paths, costs, NCC = TLAdynK(G, source, K, L, paths, costs)
+        paths, costs, NCC = TLAdynK(G, source, K, L, paths, costs, stats=stats, cancel=cancel, trie=trie)
+        if stats is not None:
+            stats.dla_rounds += 1
         
         # output for tests
-        if log_summary:
+        if log_summary and logger.isEnabledFor(logging.INFO):
             logger.info('')
             logger.info('costs summary of this level:')
             costs_tot = dict()
-            for n in G.nodes():
+            for n in G:
                 for p in range(0,len(paths.get(n,[]))):
                     if paths[n][p] is not None:
-                        costs_tot[tuple(paths[n][p])] = costs[n][p]
+                        costs_tot[tuple(trie.nodes(paths[n][p]))] = costs[n][p]
             
             # sort (from https://stackoverflow.com/a/15179418/3229162)
             costs_sorted = OrderedDict(sorted(costs_tot.items(), key=lambda t: t[1]))
@@ -225,15 +303,17 @@ def DLA(G, source, min_K=1, output_pos = False, log_summary=False, plot_K_update
             logger.info('')
         
         # Increase K for all nodes that are at their limit (fully populated)
-        saturated_nodes = [n for n in G.nodes() if len(costs[n]) > 0 and costs[n][-1] < inf]
+        saturated_nodes = [n for n in G if len(costs[n]) > 0 and costs[n][-1] < inf]
 
         if not saturated_nodes:
             break
 
-        logger.debug('updating K for saturated nodes:')
+        if debug:
+            logger.debug('updating K for saturated nodes:')
         for n in saturated_nodes:
             K[n] += 1
-            logger.debug('  K[{}] -> {}:'.format(n, K[n]))
+            if debug:
+                logger.debug('  K[{}] -> {}:'.format(n, K[n]))
 
             # Expand the memory for this node to match the new K[n].
             paths[n].append(None)
@@ -242,13 +322,7 @@ def DLA(G, source, min_K=1, output_pos = False, log_summary=False, plot_K_update
 
         if plot_K_updates:
             viz_lines = pt.print_dynamic_k(K, previous_lines_printed=viz_lines)
-        logger.debug('')
+        if debug:
+            logger.debug('')
 
-    # return
-    rpaths = dict()
-    for node in paths:
-        rpaths[node] = list()
-        for path in paths[node]:
-            if path is not None:
-                rpaths[node].append(pth.Path(G, path))
-    return rpaths, costs
+    return paths, costs, K
@@ -12,54 +12,72 @@
 #   [1]: "Accelerated label setting algorithms for the elementary resource constrained shortest path problem" by Boland, Natashia (DOI: 10.1016/j.orl.2004.11.011)
 import networkx as nx
 import numpy as np
+import heapq
 import logging
-from sys import exit
+import multiprocessing
+import time
+from concurrent import futures
 from . import tools as pt
 from . import path as pth
-
-# logging.basicConfig(level=logging.DEBUG)
-logging.basicConfig(level=logging.WARNING)
-logging.getLogger("matplotlib").setLevel(logging.INFO)
-logging.getLogger("matplotlib.font_manager").setLevel(logging.INFO)
+from . import labels as lbl
+from . import compiled as cg
+from .stats import SolverStats
+from .tables import LeastResourceTable, _res_cost_i
 
 logger = logging.getLogger(__name__)
 
-# global variables
-_resource_nr = 0
-_resource_name = 'res_cost'
-
-def prune_graph(G, source, target, max_res, res_name='res_cost'):
+def prune_graph(G, source, target, max_res, res_name='res_cost', stats=None):
     """first step of graph {G} preprocessing
     (based on algorithm 2.1, step 0, from [1])
-    Prune the graph, reducing the number of nodes and arcs, by considering least resource paths from the path {source} node to each node in the graph and from each node in the graph to the path {target} node, for each resource subject to a maximum resource in {max_res}."""
-    
-    global _resource_nr, _resource_name
+    Prune the graph, reducing the number of nodes and arcs, by considering least resource paths from the path {source} node to each node in the graph and from each node in the graph to the path {target} node, for each resource subject to a maximum resource in {max_res}.
+    Arcs u -> v between the remaining nodes are pruned as well if the least resource to u, plus the resource of the arc, plus the least resource from v to the target exceeds the maximum resource.
+    If {G} is a compiled.CompiledGraph, this is done with array operations and the pruned graph is a CompiledGraph as well.
+    Optionally, the statistics {stats} are updated."""
     
-    _resource_name = res_name
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug('Pre-process graph')
+    t0 = time.perf_counter()
     
-    logger.debug('Pre-process graph')
+    if isinstance(G, cg.CompiledGraph):
+        H, n_arcs_pruned = _prune_compiled(G, source, target, max_res)
+        _check_pruned(H, source, target)
+        if debug:
+            logger.debug('{} reachable nodes, {} arcs removed due to violation of resource'.format(len(H), n_arcs_pruned))
+        if stats is not None:
+            stats.add_time('prune', time.perf_counter() - t0)
+            stats.n_nodes = len(H)
+            stats.n_edges = H.number_of_edges()
+            stats.arcs_pruned += n_arcs_pruned
+        return H
     
     # to start with, all nodes are assumed to be reachable
     n_res = G.graph['n_res']
     reachable_nodes = set(G.nodes())
+    lengths_source_all = list()
+    lengths_target_all = list()
     
     # iterate over all resources and delete nodes that are not reachable
-    logger.debug('Delete unreachable nodes')
+    if debug:
+        logger.debug('Delete unreachable nodes')
     for res in range(0,n_res):
-        logger.debug('Treating resource {}'.format(res))
-        _resource_nr = res
+        if debug:
+            logger.debug('Treating resource {}'.format(res))
+        res_cost_i = _res_cost_i(res_name, res)
         
-        logger.debug('Calculate feasible paths from source for resource {}'.format(res))
-        lengths_source = dict(nx.single_source_dijkstra_path_length(G, source, cutoff=max_res[res], weight=_res_cost_i))
+        if debug:
+            logger.debug('Calculate feasible paths from source for resource {}'.format(res))
+        lengths_source = dict(nx.single_source_dijkstra_path_length(G, source, cutoff=max_res[res], weight=res_cost_i))
         if target not in lengths_source:
-            logger.error('target not reachable for resource {}'.format(res))
-            exit()
+            raise nx.NetworkXNoPath('target not reachable for resource {}'.format(res))
         
-        logger.debug('Calculate feasible paths to target for resource {}'.format(res))
-        lengths_target = dict(nx.single_source_dijkstra_path_length(G.reverse(copy=True), target, cutoff=max_res[res], weight=_res_cost_i))
+        if debug:
+            logger.debug('Calculate feasible paths to target for resource {}'.format(res))
+        lengths_target = dict(nx.single_source_dijkstra_path_length(G.reverse(copy=False), target, cutoff=max_res[res], weight=res_cost_i))
         if source not in lengths_target:
-            logger.error('source not reachable for resource {}'.format(res))
-            exit()
+            raise nx.NetworkXNoPath('source not reachable for resource {}'.format(res))
+        lengths_source_all.append(lengths_source)
+        lengths_target_all.append(lengths_target)
         
         nodes_to_remove = set()
         for node in reachable_nodes:
@@ -68,282 +86,658 @@ def prune_graph(G, source, target, max_res, res_name='res_cost'):
             elif lengths_source[node] + lengths_target[node] > max_res[res]:
                 nodes_to_remove.add(node)
         
-        logger.debug('Remove {} nodes due to violation of resource'.format(len(nodes_to_remove),))
+        if debug:
+            logger.debug('Remove {} nodes due to violation of resource'.format(len(nodes_to_remove),))
         for node in nodes_to_remove:
             reachable_nodes.remove(node)
     
-    logger.debug('{} reachable nodes:'.format(len(reachable_nodes)))
-    logger.debug('      {}'.format(reachable_nodes))
+    if debug:
+        logger.debug('{} reachable nodes:'.format(len(reachable_nodes)))
+        logger.debug('      {}'.format(reachable_nodes))
     
     # set up reduced graph
-    logger.debug('Set up reduced graph')
+    if debug:
+        logger.debug('Set up reduced graph')
     H = nx.DiGraph(n_res=n_res)
+    n_arcs_pruned = 0
     for node in reachable_nodes:
         for node2 in reachable_nodes:
             if G.has_edge(node, node2) and not H.has_edge(node,node2): 
+                # skip arcs that cannot be on a feasible path
+                e = G[node][node2]
+                feasible = True
+                for res in range(0,n_res):
+                    if lengths_source_all[res][node] + e[res_name][res] + lengths_target_all[res][node2] > max_res[res]:
+                        feasible = False
+                        break
+                if not feasible:
+                    n_arcs_pruned += 1
+                    continue
                 H.add_edge(node, node2)
-                for attr in G[node][node2]:
-                    H[node][node2][attr] = G[node][node2][attr]
+                for attr in e:
+                    H[node][node2][attr] = e[attr]
     #nx.draw_circular(H,with_labels=True)
     #plt.show()
+    if debug:
+        logger.debug('Remove {} arcs due to violation of resource'.format(n_arcs_pruned))
+    _check_pruned(H, source, target)
+    
+    if stats is not None:
+        stats.add_time('prune', time.perf_counter() - t0)
+        stats.n_nodes = H.number_of_nodes()
+        stats.n_edges = H.number_of_edges()
+        stats.arcs_pruned += n_arcs_pruned
     
     # return pruned graph
     return H
 
-def setup_least_resource_paths_ESPPRC(G, res_name='res_cost'):
+def _prune_compiled(G, source, target, max_res):
+    """prune_graph for the compiled.CompiledGraph {G}
+    returns the pruned CompiledGraph and the number of arcs between the remaining nodes that were pruned"""
+    
+    n_res = G.n_res
+    max_res = np.asarray(max_res, dtype=float)[0:n_res]
+    for node in (source, target):
+        if node not in G:
+            raise nx.NodeNotFound('node {} not in graph'.format(node))
+    i_source = G.index[source]
+    i_target = G.index[target]
+    G_reverse = G.reverse()
+    
+    # least resources from the source and to the target, inf if these exceed the maximum resources
+    lengths_source = np.empty((n_res, len(G)))
+    lengths_target = np.empty((n_res, len(G)))
+    for res in range(0,n_res):
+        lengths_source[res] = G.shortest_lengths(i_source, G.res[:, res], cutoff=max_res[res])
+        if lengths_source[res, i_target] == np.inf:
+            raise nx.NetworkXNoPath('target not reachable for resource {}'.format(res))
+        lengths_target[res] = G_reverse.shortest_lengths(i_target, G_reverse.res[:, res], cutoff=max_res[res])
+        if lengths_target[res, i_source] == np.inf:
+            raise nx.NetworkXNoPath('source not reachable for resource {}'.format(res))
+    
+    # nodes and arcs that can be on a feasible path
+    reachable = np.all(lengths_source + lengths_target <= max_res[:, None], axis=0)
+    tails = G.tails()
+    between = reachable[tails] & reachable[G.heads]
+    feasible = between & np.all(lengths_source[:, tails].T + G.res + lengths_target[:, G.heads].T <= max_res, axis=1)
+    return G.edge_subgraph(feasible), int(np.count_nonzero(between & ~feasible))
+
+def _check_pruned(H, source, target):
+    """raise nx.NetworkXNoPath if the {source} or {target} node is not in the pruned graph {H}
+    This happens when the target can be reached within each maximum resource separately, but not within all of them at once."""
+    for node, name in ((source, 'source'), (target, 'target')):
+        if node not in H:
+            raise nx.NetworkXNoPath('{} pruned, as no path is feasible for all resources at once'.format(name))
+
+def prune_graph_with_table(G, source, target, max_res, table, res_name='res_cost', stats=None):
+    """first step of graph {G} preprocessing, as prune_graph, but using the least resource table {table} of the whole graph {G}
+    (based on algorithm 2.1, step 0, from [1])
+    The least resource paths from the {source} node and to the {target} node are rows and columns of {table}, so that the pruning of nodes and arcs reduces to array operations.
+    Optionally, the statistics {stats} are updated."""
+
+    t0 = time.perf_counter()
+
+    reachable_nodes = _feasible_nodes(table, source, target, max_res)
+    H, n_arcs_pruned = _reduced_graph(G, reachable_nodes, table, source, target, max_res, res_name=res_name)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Remove {} arcs due to violation of resource'.format(n_arcs_pruned))
+    _check_pruned(H, source, target)
+
+    if stats is not None:
+        stats.add_time('prune', time.perf_counter() - t0)
+        stats.n_nodes = H.number_of_nodes()
+        stats.n_edges = H.number_of_edges()
+        stats.arcs_pruned += n_arcs_pruned
+
+    # return pruned graph
+    return H
+
+def _feasible_nodes(table, source, target, max_res):
+    """set of nodes of least resource table {table} that lie on a path from {source} to {target} that does not exceed the maximum resources {max_res} for any resource"""
+
+    nodes = table.nodes
+    pos = table.positions(nodes)
+    i_source = table.index[source]
+    i_target = table.index[target]
+    for res in range(0,len(table)):
+        if not table.dist[res, i_source, i_target] <= max_res[res]:
+            raise nx.NetworkXNoPath('target not reachable for resource {}'.format(res))
+
+    # least resource from source plus least resource to target, for all resources and nodes
+    lengths = table.dist[:, i_source, pos] + table.dist[:, pos, i_target]
+    feasible = np.all(lengths <= np.asarray(max_res, dtype=float)[:, None], axis=0)
+    return set(nodes[i] for i in np.flatnonzero(feasible).tolist())
+
+def _reduced_graph(G, reachable_nodes, table, source, target, max_res, res_name='res_cost'):
+    """subgraph of graph {G} with the feasible edges between {reachable_nodes}, as set up by prune_graph, using the least resource table {table}
+    returns the subgraph and the number of arcs that were pruned"""
+
+    arcs = [(node, node2) for node in reachable_nodes for node2 in G.succ[node] if node2 in reachable_nodes]
+    feasible = _feasible_arcs(G, arcs, table, source, target, max_res, res_name=res_name)
+    H = nx.DiGraph(n_res=G.graph['n_res'])
+    for (node, node2), arc_feasible in zip(arcs, feasible.tolist()):
+        if arc_feasible:
+            H.add_edge(node, node2, **G[node][node2])
+    return H, len(arcs) - int(feasible.sum())
+
+def _feasible_arcs(G, arcs, table, source, target, max_res, res_name='res_cost'):
+    """mask of the arcs {arcs} of graph {G} for which the least resource from {source}, plus the resource of the arc, plus the least resource to {target} from least resource table {table} does not exceed the maximum resources {max_res} for any resource"""
+
+    n_res = len(table)
+    if len(arcs) == 0:
+        return np.zeros(0, dtype=bool)
+    pos_u = table.positions([u for u, v in arcs])
+    pos_v = table.positions([v for u, v in arcs])
+    res = np.array([G[u][v][res_name] for u, v in arcs], dtype=float).reshape(len(arcs), -1)[:, 0:n_res]
+    lengths = table.dist[:, table.index[source], pos_u].T + res + table.dist[:, pos_v, table.index[target]].T
+    return np.all(lengths <= np.asarray(max_res, dtype=float)[0:n_res], axis=1)
+
+def setup_least_resource_paths_ESPPRC(G, res_name='res_cost', stats=None):
     """second step of graph {G} preprocessing
     (based on algorithm 2.1, step 0, from [1])
-    Solve the all-pairs shortest path problem on the graph, with lengths set to {_res_cost_i} , for each resource r."""
+    Solve the all-pairs shortest path problem on the graph, with lengths set to {_res_cost_i} , for each resource r.
+    The result is a LeastResourceTable, which can be used as a list with for each resource r a dictionary of dictionaries res_min[r][u][v].
+    Optionally, the statistics {stats} are updated."""
     
-    global _resource_nr, _resource_name
+    t0 = time.perf_counter()
+    debug = logger.isEnabledFor(logging.DEBUG)
     
-    _resource_name = res_name
+    # calculate least-resource paths for all pairs and all resources
+    if debug:
+        logger.debug('Calculate least-resource pairs')
+    res_min = LeastResourceTable.from_graph(G, res_name=res_name)
     
-    # iterate over all resources and calculate least-resource paths for all pairs
-    n_res = G.graph['n_res']
-    logger.debug('Calculate least-resource pairs')
-    res_min = list()
-    for res in range(0,n_res):
-        logger.debug('Treating resource {}'.format(res))
-        _resource_nr = res
-        res_min.append(dict(nx.all_pairs_dijkstra_path_length(G, weight=_res_cost_i)))
+    if stats is not None:
+        stats.add_time('least_resource', time.perf_counter() - t0)
     
     # return preprocessed network and least-resource paths
     return res_min
 
-def preprocess(G, source, target, max_res, res_name='res_cost'):
+def preprocess(G, source, target, max_res, res_name='res_cost', stats=None):
     """preprocess graph {G}
-    (based on algorithm 2.1, step 0, from [1])"""
+    (based on algorithm 2.1, step 0, from [1])
+    {G} can be a NetworkX graph or a compiled.CompiledGraph, set up directly from arrays, in which case the pruned graph is a CompiledGraph that can be passed on to GSSA.
+    Optionally, the statistics {stats} are updated."""
+    
+    t0 = time.perf_counter()
     
     # 1. prune graph
-    H = prune_graph(G, source, target, max_res, res_name=res_name)
+    H = prune_graph(G, source, target, max_res, res_name=res_name, stats=stats)
     
     # 2. set up least resource paths
-    res_min = setup_least_resource_paths_ESPPRC(H, res_name=res_name)
+    res_min = setup_least_resource_paths_ESPPRC(H, res_name=res_name, stats=stats)
+    
+    if stats is not None:
+        stats.add_time('preprocess', time.perf_counter() - t0)
+        stats.finish('preprocess')
     
     # return preprocessed network and least-resource paths
     return H, res_min
 
-def GLSA(G, S, source, target, max_res, res_min, res_name='res_cost'):
+def preprocess_batch(G, pairs, max_res, res_name='res_cost', stats=None):
+    """preprocess graph {G} for many source / target pairs {pairs} at once
+    (based on algorithm 2.1, step 0, from [1])
+    The least resource paths are calculated only once, on the whole graph {G}, after which each pair is pruned with prune_graph_with_table.
+    The least resource table of each pair is a restriction of this table that shares its array, so that the bounds cost no extra memory.
+    These are somewhat weaker than those of preprocess, which are calculated on the pruned graph, but the optimal path is the same.
+    The maximum resources {max_res} are either the same for all pairs or a dictionary with a value for each pair.
+    The sources can have in-edges, which are left out of their pruned graphs, as in tools.decoupled_view, since no elementary path from the source uses them.
+    The table of the whole graph {G} is shared by all pairs nevertheless, as its least resource paths are lower bounds for the graph without these in-edges.
+    Optionally, the statistics {stats} are updated.
+    Returns a dictionary with for each pair the pruned graph and least resource table, as returned by preprocess."""
+
+    t0 = time.perf_counter()
+
+    # 1. set up least resource paths of the whole graph
+    table = setup_least_resource_paths_ESPPRC(G, res_name=res_name, stats=stats)
+
+    # 2. prune graph for each pair
+    t1 = time.perf_counter()
+    preprocessed = dict()
+    for source, target in pairs:
+        max_res_pair = max_res[(source, target)] if isinstance(max_res, dict) else max_res
+        G_pair = pt.decoupled_view(G, source, source_in=object()) if G.in_degree(source) > 0 else G
+        H = prune_graph_with_table(G_pair, source, target, max_res_pair, table, res_name=res_name)
+        preprocessed[(source, target)] = (H, table.restrict(H.nodes()))
+
+    if stats is not None:
+        stats.add_time('prune', time.perf_counter() - t1)
+        stats.add_time('preprocess', time.perf_counter() - t0)
+        stats.finish('preprocess_batch')
+
+    # return preprocessed networks and least-resource paths
+    return preprocessed
+
+def GLSA(G, S, source, target, max_res, res_min, res_name='res_cost', stats=None, cancel=None, res_dtype=np.float64, batch_degree=8, eliminate_2_cycles=False):
     """General Label Setting Algorithm
-    (based on algorithm 2.1, step 1 and 2, from [1])"""
+    (based on algorithm 2.1, step 1 and 2, from [1])
+    The labels are stored compactly in a labels.LabelStore, with the edge resources as {res_dtype}.
+    The labels of nodes with at least {batch_degree} out-edges are extended to all children at once with array operations.
+    If {eliminate_2_cycles}, labels are not extended back to the node they came from, so that the paths contain no cycles u -> v -> u.
+    Optionally, the statistics {stats} are updated, and the algorithm raises tools.Cancelled when the tools.CancelToken {cancel} is cancelled."""
+    
+    store = _label_setting(G, S, source, target, max_res, res_min, res_name=res_name, stats=stats, cancel=cancel, res_dtype=res_dtype, batch_degree=batch_degree, eliminate_2_cycles=eliminate_2_cycles)
+    return _cheapest_path(*store.paths_labels(target), target)
+
+def _label_setting(G, S, source, target, max_res, res_min, res_name='res_cost', stats=None, cancel=None, res_dtype=np.float64, batch_degree=8, compiled=None, eliminate_2_cycles=False):
+    """labels of the General Label Setting Algorithm GLSA
+    The labels of nodes with at least {batch_degree} out-edges are extended to all children at once, using the graph {G} compiled to a compiled.CompiledGraph {compiled}.
+    If {eliminate_2_cycles}, labels are not extended back to their predecessor, and a label is then only dominated by a label with the same predecessor or by labels with two different predecessors.
+    returns the labels.LabelStore with the labels of each node"""
     
     # test
     if target == source:
-        logger.error('target cannot be source')
-        exit()
+        raise nx.NetworkXError('target cannot be source')
+    if source not in G or target not in G:
+        raise nx.NetworkXNoPath('source or target not in the graph, e.g. because it was pruned')
     
     # 1. Initialization
-    inf = float('inf')
+    debug = logger.isEnabledFor(logging.DEBUG)
     n_res = G.graph['n_res']
-    # paths for each node
-    paths = {source: list()}
-    paths[source].append([source])
-    # labels for each path (cost, resources):
-    labels = {source: list()}
-    labels[source].append((0,np.zeros(n_res+len(S))))
+    if compiled is None:
+        compiled = _compile(G, res_name)
+    # least resources from each node to the target and maximum resources, for the extension to all children at once
+    res_min_target = _least_resources(res_min, compiled.nodes, [target], n_res)[:, 0, :]
+    max_res_array = np.asarray(max_res, dtype=float)[0:n_res]
+    # labels (cost, resources, node resources) for each node, with pointers to the labels they were extended from
+    store = lbl.LabelStore(n_res, len(S), res_dtype=res_dtype)
+    store.add(source, 0.0, np.zeros(n_res), store.pack([]))
     # labels to treat: start with 0th label of path ending at source
     L = set([(source,0)])
+    L_heap = [(0.0,)*(n_res+len(S)) + (0, (source,0))]
+    n_heap = 1
+    # index of the node resource of each node in S
+    S_index = {n: i_S for i_S, n in enumerate(S)}
+    # strong dominance thresholds for each node: the maximum resources minus the least resources to each node in S and from there to the target
+    S_thresholds = dict()
+    S_thresholds_target = np.asarray(max_res, dtype=float)[0:n_res] - _least_resources(res_min, S, [target], n_res)[:, 0, :]
+    
+    # number of labels stored and their size, for statistics
+    if stats is not None:
+        t0 = time.perf_counter()
+        stats.update_peak(store.n_alive, store.nbytes)
     
     # 2. select lexicographically minimal label
-    logger.debug('Loop over labels to be extended')
+    if debug:
+        logger.debug('Loop over labels to be extended')
     while L:
+        if cancel is not None:
+            cancel.check()
+        
         # select lexicographically minimal label:
         #   l1 < l2 if there is a r' ∈ {1...R'}, w1 = w2 for all r = 1...r' but l1^r' < l2^r'
         # i.e. 1 2 0 < 1 3 0
         #      0 1 0 < 1 5 8
         #      etc.
-        logger.debug('Select lexicographically minimal label:')
-        LML_for_prev_res = L
-        for res in range(0,n_res+len(S)):
-            LML_for_this_res = []
-            res_LML = inf
-            for label in LML_for_prev_res:
-                res_loc = labels[label[0]][label[1]][1][res]
-                if res_loc <= res_LML:
-                    LML_for_this_res.append(label)
-            if len(LML_for_this_res) == 0:
-                logger.error('Could not find labels to select')
-                exit()
-            elif len(LML_for_this_res) > 1:
-                # go to next level with restricted set
-                logger.debug('Go to next level with restricted set {}'.format(LML_for_this_res))
-                LML_for_prev_res = LML_for_this_res
-            else:
-                # done
-                break
-        u_label = LML_for_this_res[0]
+        # The labels in L are kept in the heap L_heap, keyed by their resources, skipping those that have been removed from L.
+        if debug:
+            logger.debug('Select lexicographically minimal label:')
+        u_label = heapq.heappop(L_heap)[-1]
+        if u_label not in L:
+            continue
         u = u_label[0] 
         l = u_label[1] # noqa: E741
-        logger.debug('found lexically minimal label {}'.format(u_label))
+        if debug:
+            logger.debug('found lexically minimal label {}'.format(u_label))
         
         L.remove(u_label)
+        label_u = store.get(u, l)
+        cost_u = label_u['cost']
+        res_u = label_u['res'].astype(float)
+        bits_u = label_u['bits'].copy()
+        # node that the label came from, to which it is not extended back if 2-cycles are eliminated
+        pred_u = None
+        if eliminate_2_cycles and label_u['parent_node'] >= 0:
+            pred_u = store.nodes[label_u['parent_node']]
+        pred_v = u if eliminate_2_cycles else None
         
-        logger.debug('{}th label of node {} chosen:'.format(l,u))
-        logger.debug('{} (C {} | R {})'.format(pt.print_path(paths[u][l]),labels[u][l][0],labels[u][l][1]))
+        if debug:
+            logger.debug('{}th label of node {} chosen:'.format(l,u))
+            logger.debug('{} (C {} | R {})'.format(pt.print_path(store.path(u, l)),*store.label(u, l)))
         
         # extend label for each child
-        for v, e in G.succ[u].items():
-            logger.debug('treating edge {} -> {} (C {} | R {})'.format(u,v,e['weight'],e[res_name]))
-            if len(paths.get(v,[])) > 0: 
-                logger.debug('      with current paths:')
-            for n in range(0,len(paths.get(v,[]))):
-                logger.debug('{} (C {} | R {})'.format(pt.print_path(paths[v][n]),labels[v][n][0],labels[v][n][1]))
+        if not debug and compiled.degree[compiled.index[u]] >= batch_degree:
+            # to all children at once, keeping only those for which the edge resources are feasible
+            children = _extend_batch(compiled, u, cost_u, res_u, source, res_min_target, max_res_array, stats, pred=pred_u)
+        elif G is not compiled:
+            children = ((v, cost_u + e['weight'], res_u + e[res_name], False) for v, e in G.succ[u].items())
+        else:
+            # directly from the edge arrays if there is no NetworkX graph
+            edges = compiled.out_edges(u)
+            children = ((compiled.nodes[i_v], cost_u + weight, res_u + res, False) for i_v, weight, res in zip(compiled.heads[edges].tolist(), compiled.weight[edges].tolist(), compiled.res[edges]))
+        for v, v_cost, v_res, res_checked in children:
+            if debug:
+                e = G[u][v]
+                logger.debug('treating edge {} -> {} (C {} | R {})'.format(u,v,e['weight'],e[res_name]))
+                if len(store.slots(v)) > 0: 
+                    logger.debug('      with current paths:')
+                for n in store.slots(v):
+                    logger.debug('{} (C {} | R {})'.format(pt.print_path(store.path(v, n)),*store.label(v, n)))
             
             # error if the source is a child. The in-edges of the source need to be separated from the out-edges.
             if v == source:
-                logger.critical('ERROR: source cannot be a child')
-                quit()
+                raise nx.NetworkXError('source cannot be a child')
+            
+            # 2-cycle
+            if v == pred_u:
+                if stats is not None:
+                    stats.add_pruned('cycle')
+                if debug:
+                    logger.debug('node {} is the predecessor'.format(v))
+                continue
             
             # determine whether to create a new label on the child node
-            e_loc = np.zeros(n_res+len(S))
-            e_loc[0:n_res] = G[u][v][res_name]
-            if v in S:
-                e_loc[n_res+S.index(v)] = 1
-            v_label = (labels[u][l][0] +  G[u][v]['weight'], labels[u][l][1] +  e_loc)
+            v_bits = bits_u
             add_label = True
             
             # check edge resources
             for res in range(0,n_res):
-                if v_label[1][res] + res_min[res][v].get(target,0.0) > max_res[res]:
+                if res_checked:
+                    break
+                if v_res[res] + res_min[res][v].get(target,0.0) > max_res[res]:
                     add_label = False
-                    logger.debug('at least {} more of resource {} is needed to reach target'.format(res_min[res][v].get(target,0.0),res))
+                    if stats is not None:
+                        stats.add_pruned(res)
+                    if debug:
+                        logger.debug('at least {} more of resource {} is needed to reach target'.format(res_min[res][v].get(target,0.0),res))
                     break
             
             # check node resources
-            for res in range(0,len(S)):
-                if v_label[1][n_res+res] > 1:
+            if v in S_index:
+                if store.has_bit(bits_u, S_index[v]):
+                    if stats is not None and add_label:
+                        stats.add_pruned('node')
                     add_label = False
-                    logger.debug('node {} was used twice'.format(S[res]))
-                    break
+                    if debug:
+                        logger.debug('node {} was used twice'.format(v))
+                else:
+                    v_bits = store.with_bit(bits_u, S_index[v])
             
             # add
             if add_label:
                 # check subset of all labels that belong to the same node for domination
-                label_dominated = False
-                if len(labels.get(v,[])) > 0:
-                    for label in labels.get(v,[]):
-                        label_dominated = _is_dominated(v_label, label)
-                        if label_dominated: 
-                            break
+                label_dominated = store.is_dominated(v, v_cost, v_res, v_bits, pred=pred_v)
                 
                 if label_dominated:
-                    logger.debug('but label was dominated')
+                    if debug:
+                        logger.debug('but label was dominated')
+                    if stats is not None:
+                        stats.labels_dominated += 1
                 else:
-                    # setup label and path
-                    if labels.get(v, None) is None:
-                        paths[v] = list()
-                        labels[v] = list()
-                    v_path = list(paths[u][l])
-                    v_path.append(v)
-                    
-                    logger.debug('add undominated label {} (C {} | R {})'.format(pt.print_path(v_path),v_label[0],v_label[1]))
+                    if debug:
+                        logger.debug('add undominated label {} (C {} | R {})'.format(pt.print_path(store.path(u, l) + [v]),v_cost,v_res))
                     
                     # strong dominance: set node resource to one for nodes in S that cannot
                     # be feasibly visited with edge resources
-                    for n in S:
-                        for res in range(0,n_res):
-                            if v_label[1][res] + res_min[res][v].get(n,0.0) + res_min[res][n].get(target,0.0) > max_res[res]:
-                                if v_label[1][n_res+S.index(n)] == 0:
-                                    logger.debug('set strong dominance for node resource {}'.format(S.index(n)))
-                                    v_label[1][n_res+S.index(n)] = 1
+                    if S:
+                        if v not in S_thresholds:
+                            S_thresholds[v] = S_thresholds_target - _least_resources(res_min, [v], S, n_res)[0]
+                        unreachable = (v_res > S_thresholds[v]).any(1)
+                        if unreachable.any():
+                            if debug:
+                                for i_S in np.flatnonzero(unreachable & (store.unpack(v_bits) == 0)):
+                                    logger.debug('set strong dominance for node resource {}'.format(i_S))
+                            v_bits = v_bits | store.pack(unreachable)
                     
                     # remove dominated labels
-                    # Note: It is possible that two labels are identical but have different paths.
-                    # The iteration therefore has to be using i_label, and not, for example, using
-                    #   for label in labels.get(v,[]):
-                    i_label = 0
-                    n_labels = len(labels.get(v,[]))
-                    while i_label < n_labels:
-                        label = labels[v][i_label]
-                        if _is_dominated(label, v_label):
-                            logger.debug('remove dominated label {} (C {} | R {})'.format(pt.print_path(paths[v][i_label]),label[0],label[1]))
-                            labels[v].pop(i_label)
-                            paths[v].pop(i_label)
-                            L_rename = set()
-                            if (v, i_label) in L:
-                                L.remove((v, i_label))
-                            for i in range(i_label+1, len(labels[v])+1):
-                                if (v, i) in L:
-                                    L_rename.add((v,i-1))
-                                    L.remove((v,i))
-                            L.update(L_rename)
-                            i_label -= 1
-                            n_labels -= 1
-                        i_label += 1
+                    # Note: It is possible that two labels are identical but have different paths, in which case both are kept.
+                    for i_label in store.remove_dominated(v, v_cost, v_res, v_bits, pred=pred_v):
+                        if debug:
+                            logger.debug('remove dominated label {} (C {} | R {})'.format(pt.print_path(store.path(v, i_label)),*store.label(v, i_label)))
+                        if stats is not None:
+                            stats.labels_removed += 1
+                        L.discard((v, i_label))
                     
-                    # add label and path
-                    paths[v].append(v_path)
-                    labels[v].append(v_label)
+                    # add label and path, and add to list L
+                    v_label = (v, store.add(v, v_cost, v_res, v_bits, parent=(u, l)))
+                    L.add(v_label)
+                    heapq.heappush(L_heap, tuple(store.get(*v_label)['res'].tolist()) + tuple(store.unpack(v_bits).tolist()) + (n_heap, v_label))
+                    n_heap += 1
                     
-                    # add to list L
-                    L.add((v, len(labels[v])-1))
+                    if stats is not None:
+                        stats.labels_created += 1
+                        stats.update_peak(store.n_alive, store.nbytes)
+                        stats.max_open = max(stats.max_open, len(L))
             else:
-                logger.debug('therefore do not add unfeasible label {}'.format(v_label[1]))
+                if debug:
+                    logger.debug('therefore do not add unfeasible label {}'.format(v_res))
             
     
+    if stats is not None:
+        stats.add_time('labeling', time.perf_counter() - t0)
+        stats.finish('GLSA')
+    
+    return store
+
+def _compile(G, res_name='res_cost'):
+    """graph {G} as a compiled.CompiledGraph, or {G} itself if it already is one"""
+    if isinstance(G, cg.CompiledGraph):
+        return G
+    return cg.CompiledGraph.from_networkx(G, res_name=res_name)
+
+def _extend_batch(compiled, u, cost_u, res_u, source, res_min_target, max_res, stats=None, pred=None):
+    """extend the label with cost {cost_u} and resources {res_u} of node {u} of the compiled graph {compiled} to all children at once
+    Children for which the resources plus the least resources {res_min_target} to the target exceed the maximum resources {max_res} are pruned, as is the predecessor {pred} of the label.
+    returns the other children as a list of (child, cost, resources, True)"""
+    
+    edges = compiled.out_edges(u)
+    heads = compiled.heads[edges]
+    
+    # error if the source is a child. The in-edges of the source need to be separated from the out-edges.
+    if source in compiled.index and (heads == compiled.index[source]).any():
+        raise nx.NetworkXError('source cannot be a child')
+    
+    # 2-cycle
+    cycle = np.zeros(len(heads), dtype=bool)
+    if pred is not None:
+        cycle = heads == compiled.index[pred]
+        if stats is not None:
+            for _ in range(int(cycle.sum())):
+                stats.add_pruned('cycle')
+    
+    # check edge resources
+    v_res = res_u + compiled.res[edges]
+    unfeasible = v_res + res_min_target[heads] > max_res
+    feasible = ~unfeasible.any(1)
+    if stats is not None:
+        for res in unfeasible[~feasible & ~cycle].argmax(1).tolist():
+            stats.add_pruned(res)
+    feasible &= ~cycle
+    
+    v_cost = cost_u + compiled.weight[edges]
+    nodes = compiled.nodes
+    return [(nodes[i], c, r, True) for i, c, r in zip(heads[feasible].tolist(), v_cost[feasible].tolist(), v_res[feasible])]
+
+def _cheapest_path(paths, labels, target):
+    """returns the cheapest of the paths {paths} to {target} with its label from {labels}"""
+    
     # return cheapest paths with label
-    logger.debug('Select cheapest path to {}'.format(target))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Select cheapest path to {}'.format(target))
     
-    least_cost = inf
-    for p in range(0,len(labels[target])):
-        if labels[target][p][0] < least_cost:
-            best_path = paths[target][p]
-            best_label = labels[target][p]
+    if len(labels) == 0:
+        raise nx.NetworkXNoPath('no feasible path to {}'.format(target))
+    
+    least_cost = float('inf')
+    for p in range(0,len(labels)):
+        if labels[p][0] < least_cost:
+            best_path = paths[p]
+            best_label = labels[p]
             least_cost = best_label[0]
+    
     return best_path, best_label
 
-def GSSA(G, source, target, max_res, res_min, res_name='res_cost'):
+def GSSA(G, source, target, max_res, res_min, res_name='res_cost', stats=None, cancel=None, res_dtype=np.float64, batch_degree=8, speculative=False, max_workers=None, eliminate_2_cycles=False):
     """General State Space Augmenting Algorithm
     (based on algorithm 2.2, from [1])
-    Note: The graph must have been preprocessed so that it is reduced and has the minimal resource information in {res_min}."""
+    Note: The graph must have been preprocessed so that it is reduced and has the minimal resource information in {res_min}.
+    The edge resources of the labels are stored as {res_dtype}, labels of nodes with at least {batch_degree} out-edges are extended at once, and 2-cycles are eliminated if {eliminate_2_cycles}, as in GLSA.
+    If {speculative}, several augmentations are tried at once by {max_workers} processes, as in GSSA_iter.
+    Optionally, the statistics {stats} are updated, and the algorithm raises tools.Cancelled when the tools.CancelToken {cancel} is cancelled."""
+    
+    for path, label, lower_bound in GSSA_iter(G, source, target, max_res, res_min, res_name=res_name, stats=stats, cancel=cancel, res_dtype=res_dtype, batch_degree=batch_degree, speculative=speculative, max_workers=max_workers, eliminate_2_cycles=eliminate_2_cycles):
+        pass
+    
+    return path, label
+
+def GSSA_iter(G, source, target, max_res, res_min, res_name='res_cost', stats=None, cancel=None, res_dtype=np.float64, batch_degree=8, speculative=False, max_workers=None, eliminate_2_cycles=False):
+    """General State Space Augmenting Algorithm that yields improving solutions
+    (based on algorithm 2.2, from [1])
+    In each round, the cheapest label at {target} is a lower bound for the cost of the elementary paths, and the elementary paths among the labels at {target} are feasible.
+    Yields a tuple (path, label, lower bound) each time a cheaper elementary path is found, so that the caller can stop when a path is good enough.
+    The last tuple is the optimal path that GSSA returns, with a lower bound equal to its cost and the label of the last round, also if this path was already yielded before.
+    The paths yielded before it are all different, as each is cheaper than the previous one.
+    Note: The graph must have been preprocessed so that it is reduced and has the minimal resource information in {res_min}.
+    The edge resources of the labels are stored as {res_dtype}, labels of nodes with at least {batch_degree} out-edges are extended at once, and 2-cycles are eliminated if {eliminate_2_cycles}, as in GLSA.
+    If {speculative}, a round that finds several repeated nodes runs GLSA in a pool of {max_workers} processes for each of them added to the node resources, and for all of them together.
+    The first of these that finds an elementary path ends the search, as this path is optimal. Otherwise, the search continues with all of them added.
+    Optionally, the statistics {stats} are updated, and the algorithm raises tools.Cancelled when the tools.CancelToken {cancel} is cancelled."""
+    
+    t0 = time.perf_counter()
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug('Searching for shortest path {} -> {}'.format(source, target))
     
-    logger.debug('Searching for shortest path {} -> {}'.format(source, target))
+    # compile the graph once for all rounds
+    compiled = _compile(G, res_name)
     
     # initialize node resources and not done
     S = list([])
     DLA_done = False
+    lower_bound = -float('inf')
+    best_cost = float('inf')
+    
+    # pool of processes that each hold a copy of the graph, for the speculative augmentations
+    executor = None
+    speculated = None
+    if speculative:
+        cancel_event = multiprocessing.Event()
+        executor = futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_speculative, initargs=(G, compiled, source, target, max_res, res_min, res_name, res_dtype, batch_degree, eliminate_2_cycles, cancel_event))
+    
+    try:
+        while not DLA_done:
+            # Run dynamic labelling algorithm, unless a speculative augmentation already did
+            if speculated is None:
+                store = _label_setting(G, S, source, target, max_res, res_min, res_name=res_name, stats=stats, cancel=cancel, res_dtype=res_dtype, batch_degree=batch_degree, compiled=compiled, eliminate_2_cycles=eliminate_2_cycles)
+                paths, labels = store.paths_labels(target)
+            else:
+                S, paths, labels = speculated
+                speculated = None
+            path, label = _cheapest_path(paths, labels, target)
+            if stats is not None:
+                stats.gssa_rounds += 1
+            if debug:
+                logger.debug('found path {} (C {} | R {})'.format(pt.print_path(path, max_path_len_for_print=len(path)), label[0], label[1]))
+            lower_bound = max(lower_bound, label[0])
+            path_elems = pt.count_elems(path)
+            path_max_mult = max(path_elems.values())
+            if path_max_mult == 1:
+                if debug:
+                    logger.debug('it is elementary')
+                DLA_done = True
+            else:
+                if debug:
+                    logger.debug('but is it not elementary')
+                
+                # yield the cheapest elementary path among the other paths to the target, if it improves
+                feasible = None
+                for p in range(0,len(labels)):
+                    if labels[p][0] < best_cost and max(pt.count_elems(paths[p]).values()) == 1:
+                        feasible = p
+                        best_cost = labels[p][0]
+                if feasible is not None:
+                    if debug:
+                        logger.debug('improved elementary path {} (C {}), lower bound {}'.format(pt.print_path(paths[feasible]), best_cost, lower_bound))
+                    yield pth.Path(G,paths[feasible]), labels[feasible], lower_bound
+                
+                if executor is None:
+                    node_max_mult = max(path_elems, key=path_elems.get)
+                    S.append(node_max_mult)
+                    if debug:
+                        logger.debug('Incrementing node {}, which had multiplicity {}:'.format(node_max_mult, path_max_mult))
+                        logger.debug('S = {}'.format(S))
+                else:
+                    # the repeated nodes, from the most repeated one
+                    repeated = sorted([n for n in path_elems if path_elems[n] > 1], key=path_elems.get, reverse=True)
+                    candidates = [S + [n] for n in repeated]
+                    if len(repeated) > 1:
+                        candidates.append(S + repeated)
+                    if debug:
+                        logger.debug('Speculatively incrementing nodes {}, which had multiplicities {}:'.format(repeated, [path_elems[n] for n in repeated]))
+                    speculated = _speculate(executor, candidates, target, stats=stats, cancel=cancel)
+                    if debug:
+                        logger.debug('S = {}'.format(speculated[0]))
+            #input('PAUSED')
+    finally:
+        if executor is not None:
+            # stop the augmentations that are still running
+            cancel_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    if stats is not None:
+        stats.S = list(S)
+        stats.add_time('GSSA', time.perf_counter() - t0)
+        stats.finish('GSSA')
+    
+    yield pth.Path(G,path), label, label[0]
 
-    while not DLA_done:
-        # Run dynamic labelling algorithm
-        path, label = GLSA(G, S, source, target, max_res, res_min, res_name=res_name)
-        logger.debug('found path {} (C {} | R {})'.format(pt.print_path(path, max_path_len_for_print=len(path)), label[0], label[1]))
-        path_elems = pt.count_elems(path)
-        path_max_mult = max(path_elems.values())
-        if path_max_mult == 1:
-            logger.debug('it is elementary')
-            DLA_done = True
-        else:
-            logger.debug('but is it not elementary')
-            node_max_mult = max(path_elems, key=path_elems.get)
-            S.append(node_max_mult)
-            logger.debug('Incrementing node {}, which had multiplicity {}:'.format(node_max_mult, path_max_mult))
-            logger.debug('S = {}'.format(S))
-        #input('PAUSED')
-    
-    return pth.Path(G,path), label
-
-def _is_dominated(a, b):
-    """returns whether a label {a} is dominated by another label {b}"""
-    
-    logger.debug('check for domination of {} by {}'.format(a,b))
-    if a[0] == b[0] and all(a[1] == b[1]):
-        label_dominated = False
-    else:
-        label_dominated = True
-        if a[0] < b[0]:
-            label_dominated = False
-        if any(a[1] < b[1]):
-            label_dominated = False
-    return label_dominated
-
-def _res_cost_i(u,v,e):
-    """returns weight of certain resource with index {_resource_nr} of edge {e} from node {u} to {v}, given by variable {_resource_name}.
-    It is used by all_pairs_dijkstra_path_length:
-        'The weight of an edge is the value returned by the function.
-        The function must accept exactly three positional arguments: the two endpoints of an edge and the dictionary of edge attributes for that edge.
-        The function must return a number.'"""
-    
-    global _resource_nr, _resource_name
-    
-    return e[_resource_name][_resource_nr]
+# graph and settings of a worker process of the speculative GSSA, set once per process
+_speculative = dict()
+
+def _init_speculative(G, compiled, source, target, max_res, res_min, res_name, res_dtype, batch_degree, eliminate_2_cycles, cancel_event):
+    """initialize a worker process of the speculative GSSA"""
+    _speculative.update(G=G, compiled=compiled, source=source, target=target, max_res=max_res, res_min=res_min, res_name=res_name, res_dtype=res_dtype, batch_degree=batch_degree, eliminate_2_cycles=eliminate_2_cycles, cancel=pt.CancelToken(cancel_event))
+
+def _speculative_round(S, with_stats):
+    """run GLSA with node resources {S} in a worker process of the speculative GSSA
+    returns {S}, the paths and labels at the target and the statistics, if {with_stats}"""
+    w = _speculative
+    stats = SolverStats() if with_stats else None
+    store = _label_setting(w['G'], S, w['source'], w['target'], w['max_res'], w['res_min'], res_name=w['res_name'], stats=stats, cancel=w['cancel'], res_dtype=w['res_dtype'], batch_degree=w['batch_degree'], compiled=w['compiled'], eliminate_2_cycles=w['eliminate_2_cycles'])
+    paths, labels = store.paths_labels(w['target'])
+    return S, paths, labels, stats
+
+def _speculate(executor, candidates, target, stats=None, cancel=None):
+    """run GLSA for each of the node resources in {candidates} in the process pool {executor}
+    returns (S, paths, labels) for the first candidate of which the cheapest path to {target} is elementary, or else for the last candidate"""
+    
+    pending = {executor.submit(_speculative_round, S, stats is not None): i for i, S in enumerate(candidates)}
+    results = dict()
+    while pending:
+        done, _ = futures.wait(pending, timeout=0.1, return_when=futures.FIRST_COMPLETED)
+        if cancel is not None:
+            cancel.check()
+        for future in done:
+            i = pending.pop(future)
+            S, paths, labels, candidate_stats = future.result()
+            if stats is not None:
+                stats.merge(candidate_stats)
+            path, label = _cheapest_path(paths, labels, target)
+            if max(pt.count_elems(path).values()) == 1:
+                for other in pending:
+                    other.cancel()
+                return S, paths, labels
+            results[i] = (S, paths, labels)
+    
+    return results[len(candidates)-1]
+
+def _least_resources(res_min, sources, targets, n_res):
+    """returns the least resources {res_min} from the nodes {sources} to the nodes {targets} as an array of shape (len(sources), len(targets), n_res), with 0.0 where there is no path"""
+    
+    if isinstance(res_min, LeastResourceTable):
+        # look up all pairs at once
+        positions = [res_min.index.get(n, -1) for n in list(sources) + list(targets)]
+        known = np.array([i >= 0 for i in positions], dtype=bool)
+        positions = np.array([max(i, 0) for i in positions], dtype=np.intp)
+        rows, cols = positions[:len(sources)], positions[len(sources):]
+        lengths = res_min.dist[:, rows][:, :, cols].transpose(1, 2, 0).astype(float)
+        lengths[~(known[:len(sources), None] & known[None, len(sources):])] = 0.0
+        lengths[np.isinf(lengths)] = 0.0
+        return lengths
+    
+    lengths = np.zeros((len(sources), len(targets), n_res))
+    for i_u, u in enumerate(sources):
+        for i_v, v in enumerate(targets):
+            for res in range(0,n_res):
+                lengths[i_u, i_v, res] = res_min[res][u].get(v,0.0)
+    return lengths
@@ -1,6 +1,16 @@
 __version__ = '1.0.6'
 __name__ = 'pylgrim'
-from . import ESPP as ESPP
-from . import ESPPRC as ESPPRC
-from . import tools as tools
-from . import path as path
\ No newline at end of file
+
+# The submodules are imported lazily on first attribute access (PEP 562), so that
+# `import pylgrim` is fast and does not import NetworkX or NumPy.
+import importlib
+
+_submodules = ('ESPP', 'ESPPRC', 'tools', 'path', 'stats', 'tables', 'incremental', 'aio', 'labels', 'compiled', 'batch', 'trie')
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals()) + list(_submodules))
@@ -0,0 +1,11 @@
+# Entry point of python -m pylgrim:
+#   * runs the batch solver of pylgrim.batch, which is a module of its own so that its worker processes can import it.
+#
+# Author:
+#   Toon Weyens
+
+import sys
+from .batch import main
+
+if __name__ == "__main__":
+    sys.exit(main())
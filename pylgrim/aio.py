@@ -0,0 +1,63 @@
+# Asyncio entry points for pylgrim:
+#   * preprocess, GSSA and DLA run the solvers of the same name in an executor, so that they do not block the event loop.
+#   * When the awaiting task is cancelled, e.g. by a timeout of asyncio.wait_for, the solver is cancelled through a tools.CancelToken,
+#     so that it stops at its next iteration and frees its worker.
+#   * In a concurrent.futures.ProcessPoolExecutor, the solver runs on a pickled copy of its arguments, so that {stats} passed to it are not filled in.
+#     It is cancelled through an event of a multiprocessing.Manager, which is started once, when it is first needed, and which the solver queries at most every 10 ms.
+#
+# Author:
+#   Toon Weyens
+
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent import futures
+from . import ESPP
+from . import ESPPRC
+from . import tools as pt
+
+# interval in seconds at which a solver in a process pool checks whether it is cancelled
+_PROCESS_CANCEL_INTERVAL = 0.01
+
+# manager of the events that cancel solvers in process pools, started when it is first needed
+_manager = None
+_manager_lock = threading.Lock()
+
+def _process_cancel_token():
+    """CancelToken that can be sent to a process pool, backed by an event of the shared multiprocessing.Manager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = multiprocessing.Manager()
+    return pt.CancelToken(_manager.Event(), interval=_PROCESS_CANCEL_INTERVAL)
+
+async def _run(func, *args, executor=None, cancellable=True, **kwargs):
+    """Run {func} with arguments {args} and {kwargs} in {executor} (default: the executor of the event loop), cancelling it when the awaiting task is cancelled.
+    In a process pool, the token is backed by an event of a multiprocessing.Manager, as a threading.Event cannot be pickled."""
+    loop = asyncio.get_running_loop()
+    if cancellable and isinstance(executor, futures.ProcessPoolExecutor):
+        cancel = _process_cancel_token()
+    else:
+        cancel = pt.CancelToken()
+    if cancellable:
+        kwargs['cancel'] = cancel
+    future = loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+    try:
+        return await future
+    except asyncio.CancelledError:
+        cancel.cancel()
+        raise
+
+async def preprocess(G, source, target, max_res, res_name='res_cost', stats=None, executor=None):
+    """Asynchronous ESPPRC.preprocess, run in {executor}.
+    The preprocessing itself cannot be interrupted, so that a cancelled call still occupies its worker until it finishes."""
+    return await _run(ESPPRC.preprocess, G, source, target, max_res, res_name=res_name, stats=stats, executor=executor, cancellable=False)
+
+async def GSSA(G, source, target, max_res, res_min, res_name='res_cost', stats=None, executor=None):
+    """Asynchronous ESPPRC.GSSA, run in {executor}."""
+    return await _run(ESPPRC.GSSA, G, source, target, max_res, res_min, res_name=res_name, stats=stats, executor=executor)
+
+async def DLA(G, source, min_K=1, stats=None, executor=None):
+    """Asynchronous ESPP.DLA, run in {executor}."""
+    return await _run(ESPP.DLA, G, source, min_K=min_K, stats=stats, executor=executor)
@@ -0,0 +1,211 @@
+# Batch solver for pylgrim, run from the command line with python -m pylgrim:
+#   * It reads instances from edge-list CSV files, JSON Lines files (or standard input) with one instance per line,
+#     or directories saved with tables.save_preprocessed, and solves them with ESPPRC (preprocess and GSSA) or ESPP.DLA in a pool of worker processes.
+#   * The instances are read lazily, and at most a fixed number of them is in the pool at a time, so that the memory stays bounded for any number of instances.
+#   * One JSON line is written per instance as soon as it is solved, in the order in which they finish, with its path, cost and timings.
+#
+# Formats:
+#   * CSV: one instance per file, with a header and a row per edge: source, target, weight and one column per resource.
+#   * JSON Lines: one instance per line, as {"id": ..., "source": ..., "target": ..., "max_res": [...], "edges": [[u, v, weight, [res, ...]], ...]},
+#     where only the edges are required.
+#   * Directories saved with tables.save_preprocessed, which are not preprocessed again.
+#   The source, target and maximum resources given on the command line are used for the instances that do not give them.
+#   The source is decoupled as in tools.decouple_source: its in-edges lead to a node source_in instead, so that the target source_in gives the cheapest tour back to the source.
+#
+# Usage:
+#   python -m pylgrim INSTANCE [INSTANCE ...] [--solver GSSA|DLA] [--source S] [--target T] [--max-res R [R ...]]
+#                     [--workers N] [--max-pending M] [--max-tasks-per-child K] [--output FILE]
+#
+# Author:
+#   Toon Weyens
+
+import argparse
+import csv
+import functools
+import json
+import os
+import sys
+import time
+from concurrent import futures
+import networkx as nx
+import numpy as np
+from . import ESPP
+from . import ESPPRC
+from . import tables
+from .compiled import CompiledGraph
+from .stats import SolverStats
+
+SOLVERS = ('GSSA', 'DLA')
+
+def read_instances(paths):
+    """Yield the instances in the files or directories {paths} one by one, as dictionaries with their id and what is needed to load them.
+    JSON Lines files are read line by line, and '-' reads them from the standard input."""
+    for path in paths:
+        if path == '-':
+            for i_line, line in enumerate(sys.stdin, 1):
+                if line.strip():
+                    yield dict(id='-:{}'.format(i_line), kind='jsonl', line=line)
+        elif os.path.isdir(path):
+            yield dict(id=path, kind='preprocessed', path=path)
+        elif path.endswith('.jsonl') or path.endswith('.json'):
+            with open(path) as f:
+                for i_line, line in enumerate(f, 1):
+                    if line.strip():
+                        yield dict(id='{}:{}'.format(path, i_line), kind='jsonl', line=line)
+        else:
+            yield dict(id=path, kind='csv', path=path)
+
+def node_label(text):
+    """node label given as text {text}, which is an integer if it can be read as one"""
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+def load_instance(instance, source=None, target=None, max_res=None):
+    """Load the instance {instance} given by read_instances, with default {source}, {target} and maximum resources {max_res}.
+    Returns the graph, its least resource table if it is already preprocessed (else None), the source, the target and the maximum resources."""
+    res_min = None
+    if instance['kind'] == 'preprocessed':
+        G, res_min = tables.load_preprocessed(instance['path'])
+        n_res = G.graph['n_res']
+    else:
+        if instance['kind'] == 'jsonl':
+            data = json.loads(instance['line'])
+            instance['id'] = data.get('id', instance['id'])
+            source = data.get('source', source)
+            target = data.get('target', target)
+            max_res = data.get('max_res', max_res)
+            edges = data['edges']
+        else:
+            with open(instance['path'], newline='') as f:
+                rows = csv.reader(f)
+                next(rows)
+                edges = [(node_label(row[0]), node_label(row[1]), float(row[2]), [float(r) for r in row[3:]]) for row in rows if row]
+        if source is None:
+            raise ValueError('no source given')
+        G = _edges_graph(edges, source)
+        n_res = G.n_res
+    if max_res is not None:
+        max_res = np.broadcast_to(np.asarray(max_res, dtype=float), (n_res,))
+    return G, res_min, source, target, max_res
+
+def _edges_graph(edges, source, source_in='source_in'):
+    """compiled.CompiledGraph with the edges (u, v, weight, resources) {edges}, in which the in-edges of {source} lead to a node {source_in} instead, as in tools.decouple_source"""
+    nodes = list()
+    index = dict()
+    def position(n):
+        if n not in index:
+            index[n] = len(nodes)
+            nodes.append(n)
+        return index[n]
+    position(source)
+    if any(source_in in (edge[0], edge[1]) for edge in edges):
+        raise ValueError('node {} already in graph'.format(source_in))
+    edges = [(edge[0], source_in if edge[1] == source else edge[1]) + tuple(edge[2:]) for edge in edges]
+    sources = [position(edge[0]) for edge in edges]
+    targets = [position(edge[1]) for edge in edges]
+    weight = [edge[2] for edge in edges]
+    res = np.array([np.atleast_1d(np.asarray(edge[3], dtype=float)) if len(edge) > 3 else [] for edge in edges], dtype=float).reshape(len(edges), -1)
+    return CompiledGraph.from_arrays(sources, targets, weight, res, nodes=nodes)
+
+def solve_instance(instance, solver='GSSA', source=None, target=None, max_res=None):
+    """Load and solve the instance {instance} given by read_instances with {solver}, with default {source}, {target} and maximum resources {max_res}.
+    GSSA gives the cheapest feasible path to the target, DLA the cost of the cheapest path to each node, and the path to the target if there is one.
+    Returns the result as a dictionary that can be written as JSON, with the status 'ok', 'infeasible' or 'error' and the seconds spent on each step."""
+    t0 = time.perf_counter()
+    result = dict(instance=instance['id'], solver=solver)
+    seconds = dict()
+    stats = SolverStats()
+    try:
+        G, res_min, source, target, max_res = load_instance(instance, source=source, target=target, max_res=max_res)
+        result['instance'] = instance['id']
+        seconds['read'] = time.perf_counter() - t0
+        if solver == 'GSSA':
+            if target is None:
+                raise ValueError('no target given')
+            if max_res is None:
+                raise ValueError('no maximum resources given')
+            if res_min is None:
+                t1 = time.perf_counter()
+                G, res_min = ESPPRC.preprocess(G, source, target, max_res, stats=stats)
+                seconds['preprocess'] = time.perf_counter() - t1
+            t1 = time.perf_counter()
+            path, label = ESPPRC.GSSA(G, source, target, max_res, res_min, stats=stats)
+            seconds['solve'] = time.perf_counter() - t1
+            result.update(status='ok', path=_path_nodes(path), cost=float(label[0]), res=label[1].tolist(), rounds=stats.gssa_rounds)
+        else:
+            t1 = time.perf_counter()
+            paths, costs = ESPP.DLA(G, source, stats=stats)
+            seconds['solve'] = time.perf_counter() - t1
+            result.update(status='ok', costs={str(n): float(costs[n][0]) for n in costs if len(costs[n]) > 0 and costs[n][0] < np.inf}, rounds=stats.dla_rounds)
+            if target is not None and len(paths.get(target, [])) > 0:
+                result.update(path=_path_nodes(paths[target][0]), cost=float(costs[target][0]))
+    except nx.NetworkXNoPath as e:
+        result.update(status='infeasible', error=str(e))
+    except Exception as e:
+        result.update(status='error', error=repr(e))
+    seconds['total'] = time.perf_counter() - t0
+    result['seconds'] = seconds
+    return result
+
+def _path_nodes(path):
+    """nodes of the path.Path {path} in order"""
+    return [path.source] + [v for _, v, _ in path]
+
+def solve_all(instances, solve, workers=1, max_pending=None, max_tasks_per_child=None):
+    """Yield the results of {solve} for the instances {instances} in the order in which they finish.
+    With more than one worker, they are solved in a pool of {workers} processes, to which at most {max_pending} instances (default: twice the workers) are submitted at a time.
+    Each process is replaced after {max_tasks_per_child} instances if given, which frees the memory it holds on to."""
+    if workers == 1:
+        for instance in instances:
+            yield solve(instance)
+        return
+    if max_pending is None:
+        max_pending = 2*workers
+    instances = iter(instances)
+    executor = futures.ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child)
+    try:
+        pending = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                instance = next(instances, None)
+                if instance is None:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(solve, instance))
+            if not pending:
+                break
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pylgrim', description='Solve shortest path instances with pylgrim, writing one JSON line per instance.')
+    parser.add_argument('instances', nargs='+', help='CSV edge lists, JSON Lines files (- for standard input) or directories saved with tables.save_preprocessed')
+    parser.add_argument('--solver', default='GSSA', choices=SOLVERS)
+    parser.add_argument('--source', type=node_label, default=None, help='source of the instances that do not give one')
+    parser.add_argument('--target', type=node_label, default=None, help='target of the instances that do not give one')
+    parser.add_argument('--max-res', nargs='+', type=float, default=None, help='maximum resources of the instances that do not give them, one value for all resources or one per resource (required for GSSA)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes (default: number of CPUs), 1 to solve in this process')
+    parser.add_argument('--max-pending', type=int, default=None, help='maximum number of instances in the pool at a time (default: twice the workers)')
+    parser.add_argument('--max-tasks-per-child', type=int, default=None, help='number of instances after which a worker process is replaced')
+    parser.add_argument('--output', default=None, help='JSON lines file to write the results to (default: stdout)')
+    args = parser.parse_args(argv)
+
+    solve = functools.partial(solve_instance, solver=args.solver, source=args.source, target=args.target, max_res=args.max_res)
+    out = open(args.output, 'w') if args.output else sys.stdout
+    n_errors = 0
+    try:
+        for result in solve_all(read_instances(args.instances), solve, workers=args.workers, max_pending=args.max_pending, max_tasks_per_child=args.max_tasks_per_child):
+            out.write(json.dumps(result, default=str) + '\n')
+            out.flush()
+            if result['status'] == 'error':
+                n_errors += 1
+    finally:
+        if args.output:
+            out.close()
+    return 1 if n_errors > 0 else 0
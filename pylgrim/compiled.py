@@ -0,0 +1,207 @@
+# Compiled graphs for pylgrim:
+#   * CompiledGraph stores the out-edges of a graph in compressed sparse row (CSR) format, with their weights and resources as NumPy arrays,
+#     so that all out-edges of a node can be treated at once with array operations.
+#   * A CompiledGraph can be set up directly from edge arrays or from a CSR triple, without building a NetworkX graph first.
+#     The solvers accept it instead of a NetworkX graph, and give their results in terms of its node labels.
+#     For this, it can be read as a NetworkX graph, i.e. G.graph['n_res'], G.succ[u][v] and G[u][v] with the edge attributes 'weight' and {res_name}.
+#
+# Author:
+#   Toon Weyens
+
+import heapq
+from collections.abc import Mapping
+import networkx as nx
+import numpy as np
+
+class CompiledGraph:
+    """Graph with {n_res} resources in compressed sparse row format.
+    The out-edges of the node {nodes}[i] are the positions indptr[i] to indptr[i+1] of the arrays {heads} (the positions of the nodes they lead to), {weight} and {res} (one row per edge).
+    Read as a NetworkX graph, the resources of the edges are given by the edge attribute {res_name}."""
+    def __init__(self, nodes, indptr, heads, weight, res, n_res, res_name='res_cost'):
+        self.nodes = list(nodes)
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        self.indptr = indptr
+        self.heads = heads
+        self.weight = weight
+        self.res = res
+        self.n_res = n_res
+        self.res_name = res_name
+        self.degree = np.diff(indptr)
+        self.graph = {'n_res': n_res}
+        self.succ = _Successors(self)
+
+    @classmethod
+    def from_networkx(cls, G, res_name='res_cost'):
+        """Compile the graph {G}, with the resources of the edges given by the edge attribute {res_name}."""
+        nodes = list(G.nodes())
+        index = {n: i for i, n in enumerate(nodes)}
+        n_res = G.graph['n_res']
+        n_edges = G.number_of_edges()
+        indptr = np.zeros(len(nodes)+1, dtype=np.intp)
+        heads = np.empty(n_edges, dtype=np.intp)
+        weight = np.empty(n_edges)
+        res = np.empty((n_edges, n_res))
+        i_edge = 0
+        for i, u in enumerate(nodes):
+            for v, e in G.succ[u].items():
+                heads[i_edge] = index[v]
+                weight[i_edge] = e['weight']
+                res[i_edge] = e[res_name]
+                i_edge += 1
+            indptr[i+1] = i_edge
+        return cls(nodes, indptr, heads, weight, res, n_res, res_name=res_name)
+
+    @classmethod
+    def from_arrays(cls, sources, targets, weight, res, nodes=None, res_name='res_cost', n_res=None):
+        """Set up the graph with the edges {sources}[j] -> {targets}[j], with weight {weight}[j] and resources {res}[j], an array with one row per edge.
+        The sources and targets are positions in the list of node labels {nodes}, which are 0, 1, ... up to the largest position by default.
+        The number of resources {n_res} is that of the columns of {res} by default, which must then be given as a 2-D array if there are no edges.
+        The edges of each node keep the order in which they are given.
+        Raises ValueError if the arrays do not have one entry per edge, or if the edges lead from or to nodes that are not in {nodes}."""
+        sources = np.asarray(sources, dtype=np.intp)
+        targets = np.asarray(targets, dtype=np.intp)
+        weight = np.asarray(weight, dtype=float)
+        if sources.ndim != 1 or targets.shape != sources.shape or weight.shape != sources.shape:
+            raise ValueError('sources, targets and weight must be 1-D arrays of the same length, not of shapes {}, {} and {}'.format(sources.shape, targets.shape, weight.shape))
+        res = _res_matrix(res, len(sources), n_res)
+        if nodes is None:
+            nodes = range(0, int(max(sources.max(initial=-1), targets.max(initial=-1)))+1)
+        n_nodes = len(nodes)
+        if len(sources) > 0 and (min(sources.min(), targets.min()) < 0 or max(sources.max(), targets.max()) >= n_nodes):
+            raise ValueError('edges lead from or to nodes that are not in the graph of {} nodes'.format(n_nodes))
+        order = np.argsort(sources, kind='stable')
+        indptr = np.zeros(n_nodes+1, dtype=np.intp)
+        np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+        return cls.from_csr(indptr, targets[order], weight[order], res[order], nodes=nodes, res_name=res_name, n_res=res.shape[1])
+
+    @classmethod
+    def from_csr(cls, indptr, indices, weight, res, nodes=None, res_name='res_cost', n_res=None):
+        """Set up the graph from the CSR triple ({indptr}, {indices}, {weight}), as that of a sparse matrix with the weight of the edge i -> j in row i and column j, and the resources {res} of the edges in the same order.
+        The rows and columns are positions in the list of node labels {nodes}, which are 0, 1, ... by default.
+        The number of resources {n_res} is derived from {res} as in from_arrays.
+        Raises ValueError if the arrays are not a valid CSR triple with one row per node, or if the resources do not have one row per edge."""
+        indptr = np.asarray(indptr, dtype=np.intp)
+        heads = np.asarray(indices, dtype=np.intp)
+        weight = np.asarray(weight, dtype=float)
+        if indptr.ndim != 1 or len(indptr) == 0 or indptr[0] != 0 or indptr[-1] != len(heads) or (np.diff(indptr) < 0).any():
+            raise ValueError('indptr must start at 0, not decrease and end at the number of edges {}'.format(len(heads)))
+        if heads.ndim != 1 or weight.shape != heads.shape:
+            raise ValueError('indices and weight must be 1-D arrays of the same length, not of shapes {} and {}'.format(heads.shape, weight.shape))
+        res = _res_matrix(res, len(heads), n_res)
+        if nodes is None:
+            nodes = range(0, len(indptr)-1)
+        if len(nodes) != len(indptr)-1:
+            raise ValueError('there are {} node labels for {} rows'.format(len(nodes), len(indptr)-1))
+        if len(heads) > 0 and (heads.min() < 0 or heads.max() >= len(nodes)):
+            raise ValueError('edges lead to nodes that are not in the graph')
+        return cls(nodes, indptr, heads, weight, res, res.shape[1], res_name=res_name)
+
+    def to_networkx(self):
+        """graph as a NetworkX DiGraph"""
+        G = nx.DiGraph(n_res=self.n_res)
+        G.add_nodes_from(self.nodes)
+        for u in self.nodes:
+            for v, e in self.succ[u].items():
+                G.add_edge(u, v, **e)
+        return G
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __contains__(self, u):
+        return u in self.index
+
+    def __getitem__(self, u):
+        return self.succ[u]
+
+    def number_of_edges(self):
+        return len(self.heads)
+
+    def out_edges(self, u):
+        """slice of the out-edges of node {u} in the edge arrays"""
+        i = self.index[u]
+        return slice(self.indptr[i], self.indptr[i+1])
+
+    def tails(self):
+        """positions of the nodes that the edges come from"""
+        return np.repeat(np.arange(len(self.nodes)), self.degree)
+
+    def reverse(self):
+        """graph with all edges reversed"""
+        tails = self.tails()
+        order = np.argsort(self.heads, kind='stable')
+        indptr = np.zeros(len(self.nodes)+1, dtype=np.intp)
+        np.cumsum(np.bincount(self.heads, minlength=len(self.nodes)), out=indptr[1:])
+        return CompiledGraph(self.nodes, indptr, tails[order], self.weight[order], self.res[order], self.n_res, res_name=self.res_name)
+
+    def edge_subgraph(self, keep):
+        """graph with only the edges for which the mask {keep} is true, and the nodes of these edges"""
+        tails = self.tails()[keep]
+        heads = self.heads[keep]
+        used = np.zeros(len(self.nodes), dtype=bool)
+        used[tails] = True
+        used[heads] = True
+        position = np.cumsum(used) - 1
+        nodes = [self.nodes[i] for i in np.flatnonzero(used).tolist()]
+        indptr = np.zeros(len(nodes)+1, dtype=np.intp)
+        np.cumsum(np.bincount(position[tails], minlength=len(nodes)), out=indptr[1:])
+        return CompiledGraph(nodes, indptr, position[heads], self.weight[keep], self.res[keep], self.n_res, res_name=self.res_name)
+
+    def shortest_lengths(self, source, lengths, cutoff=np.inf):
+        """lengths of the shortest paths from the node at position {source} to the node at each position, with the edge lengths {lengths}, which must be nonnegative (Dijkstra)
+        The nodes that cannot be reached within {cutoff} have length inf."""
+        indptr = self.indptr.tolist()
+        heads = self.heads.tolist()
+        lengths = np.asarray(lengths, dtype=float).tolist()
+        inf = float('inf')
+        dist = [inf] * len(self.nodes)
+        dist[source] = 0.0
+        done = [False] * len(self.nodes)
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            for i_edge in range(indptr[u], indptr[u+1]):
+                v = heads[i_edge]
+                d_v = d + lengths[i_edge]
+                if d_v < dist[v] and d_v <= cutoff:
+                    dist[v] = d_v
+                    heapq.heappush(heap, (d_v, v))
+        return np.array(dist)
+
+class _Successors(Mapping):
+    """successors of each node of the CompiledGraph {compiled}, as G.succ of a NetworkX graph"""
+    def __init__(self, compiled):
+        self.compiled = compiled
+
+    def __getitem__(self, u):
+        compiled = self.compiled
+        edges = compiled.out_edges(u)
+        return {compiled.nodes[v]: {'weight': weight, compiled.res_name: res} for v, weight, res in zip(compiled.heads[edges].tolist(), compiled.weight[edges].tolist(), compiled.res[edges])}
+
+    def __iter__(self):
+        return iter(self.compiled.nodes)
+
+    def __len__(self):
+        return len(self.compiled.nodes)
+
+def _res_matrix(res, n_edges, n_res=None):
+    """resources {res} of {n_edges} edges as an array with one row per edge and {n_res} columns, or as many as the columns of {res} if None"""
+    res = np.asarray(res, dtype=float)
+    if res.ndim == 2 and res.shape[0] != n_edges:
+        raise ValueError('there are {} rows of resources for {} edges'.format(res.shape[0], n_edges))
+    if n_res is None:
+        if res.ndim == 2:
+            n_res = res.shape[1]
+        elif n_edges > 0:
+            n_res = res.size // n_edges
+        else:
+            raise ValueError('the number of resources of a graph without edges must be given as n_res or by the shape of res')
+    if res.size != n_edges*n_res:
+        raise ValueError('there are {} resources for {} edges with {} resources each'.format(res.size, n_edges, n_res))
+    return res.reshape(n_edges, n_res)
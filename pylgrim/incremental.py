@@ -0,0 +1,162 @@
+# Incremental preprocessing for pylgrim:
+#   * IncrementalPreprocess keeps the least resource table of the whole graph, so that the preprocessing result can be updated when edges are added, removed or get other resources.
+#     Only the affected least resource distances are repaired, and the pruning decisions are derived again from the rows of the source and the columns of the target.
+#     Only the arcs of nodes of which the least resource from the source or to the target changed are checked again.
+#
+# Author:
+#   Toon Weyens
+
+import logging
+import time
+import networkx as nx
+import numpy as np
+from . import ESPPRC
+
+logger = logging.getLogger(__name__)
+
+class IncrementalPreprocess:
+    """Preprocessing result of graph {G} for the path from {source} to {target} with maximum resources {max_res}, that can be updated when edges of {G} change.
+    The attributes H and res_min are the pruned graph and the least resource table, as returned by ESPPRC.preprocess, and can be passed to ESPPRC.GSSA.
+    The least resource paths are those of the whole graph {G} instead of the pruned graph, which are lower bounds that are valid for any pruning.
+    Optionally, the statistics {stats} are updated."""
+    def __init__(self, G, source, target, max_res, res_name='res_cost', stats=None):
+        self.G = G
+        self.source = source
+        self.target = target
+        self.max_res = max_res
+        self.res_name = res_name
+
+        t0 = time.perf_counter()
+        self.table = ESPPRC.setup_least_resource_paths_ESPPRC(G, res_name=res_name, stats=stats)
+        self.H = ESPPRC.prune_graph_with_table(G, source, target, max_res, self.table, res_name=res_name, stats=stats)
+        self.res_min = self.table.restrict(self.H.nodes())
+
+        if stats is not None:
+            stats.add_time('preprocess', time.perf_counter() - t0)
+            stats.finish('preprocess')
+
+    def update(self, changes, stats=None):
+        """Apply the edge changes {changes} to the graph and update the preprocessing result.
+        Each change is a tuple (u, v, attr), where {attr} is a dictionary of edge attributes that are set on the edge u -> v, which is added if it does not exist yet, or None to remove the edge.
+        The graph G is modified in place.
+        If the target cannot be reached anymore, H and res_min are left empty and nx.NetworkXNoPath is raised, after which later changes can make it reachable again.
+        Optionally, the statistics {stats} are updated.
+        Returns the updated pruned graph H and least resource table res_min.
+        Note: res_min is a restriction of the table of the whole graph, and shares its array without copying it.
+        Later updates repair this array in place, so that a res_min returned before changes with them, unless the array grew to add a node.
+        Use it before the next update, or copy res_min.dist if it must be kept."""
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        t0 = time.perf_counter()
+        G = self.G
+        table = self.table
+        res_name = self.res_name
+        i_source = table.index[self.source]
+        i_target = table.index[self.target]
+        n_before = len(table.nodes)
+        lengths_source = table.dist[:, i_source, 0:n_before].copy()
+        lengths_target = table.dist[:, 0:n_before, i_target].copy()
+
+        # 1. apply the changes to the graph and repair the least resource table
+        changed_edges = list()
+        n_decreased = 0
+        n_recalculated = 0
+        for u, v, attr in changes:
+            res_old = G[u][v][res_name] if G.has_edge(u, v) else None
+            if attr is None:
+                if res_old is None:
+                    continue
+                G.remove_edge(u, v)
+                res_new = None
+            else:
+                for node in (u, v):
+                    if node not in table.index:
+                        table.add_node(node)
+                G.add_edge(u, v, **attr)
+                res_new = G[u][v][res_name]
+            if debug:
+                logger.debug('Edge {} -> {} changed from {} to {}'.format(u, v, res_old, res_new))
+            decreased, recalculated = table.update_edge(G, u, v, res_old, res_new, res_name=res_name)
+            n_decreased += decreased
+            n_recalculated += recalculated
+            changed_edges.append((u, v))
+
+        # 2. and 3. prune again, leaving an empty pruned graph if the target cannot be reached anymore
+        try:
+            n_added, n_removed, n_arcs = self._prune_again(changed_edges, n_before, lengths_source, lengths_target)
+        except nx.NetworkXNoPath:
+            self.H.remove_nodes_from(list(self.H))
+            self.res_min = table.restrict([])
+            raise
+        H = self.H
+        self.res_min = table.restrict(H.nodes())
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('{} edges changed: {} least resources decreased, {} sources recalculated, {} nodes added and {} removed, {} arcs checked again'.format(
+                len(changed_edges), n_decreased, n_recalculated, n_added, n_removed, n_arcs))
+        if stats is not None:
+            stats.add_time('update', time.perf_counter() - t0)
+            stats.n_nodes = H.number_of_nodes()
+            stats.n_edges = H.number_of_edges()
+            stats.finish('update')
+
+        return H, self.res_min
+
+    def _prune_again(self, changed_edges, n_before, lengths_source, lengths_target):
+        """Update the pruned graph H in place after the edges {changed_edges} of the graph changed, given the least resources {lengths_source} from the source and {lengths_target} to the target of the first {n_before} nodes of the table before the changes.
+        Raises nx.NetworkXNoPath if the target cannot be reached anymore, or if the source or target is pruned.
+        Returns the number of nodes added and removed, and the number of arcs checked again."""
+
+        G = self.G
+        table = self.table
+        res_name = self.res_name
+        i_source = table.index[self.source]
+        i_target = table.index[self.target]
+
+        # derive the pruning decisions again
+        H = self.H
+        reachable_nodes = ESPPRC._feasible_nodes(table, self.source, self.target, self.max_res)
+        nodes_removed = set(H.nodes()) - reachable_nodes
+        nodes_added = reachable_nodes - set(H.nodes())
+        touched = set(nodes_added)
+        for node in nodes_removed:
+            touched.update(H.pred[node])
+            touched.update(H.succ[node])
+        H.remove_nodes_from(nodes_removed)
+
+        # check the arcs again of the nodes that were added or of which the least resource from the source or to the target changed, and the changed arcs
+        n = len(table.nodes)
+        changed_source = np.ones(n, dtype=bool)
+        changed_source[0:n_before] = (table.dist[:, i_source, 0:n_before] != lengths_source).any(0)
+        changed_target = np.ones(n, dtype=bool)
+        changed_target[0:n_before] = (table.dist[:, 0:n_before, i_target] != lengths_target).any(0)
+        arcs = set(changed_edges)
+        for i in np.flatnonzero(changed_source).tolist():
+            node = table.nodes[i]
+            if node in reachable_nodes:
+                arcs.update((node, node2) for node2 in G.succ[node])
+        for i in np.flatnonzero(changed_target).tolist():
+            node = table.nodes[i]
+            if node in reachable_nodes:
+                arcs.update((node2, node) for node2 in G.pred[node])
+        for node in nodes_added:
+            arcs.update((node, node2) for node2 in G.succ[node])
+            arcs.update((node2, node) for node2 in G.pred[node])
+        arcs = list(arcs)
+        candidates = [(u, v) for u, v in arcs if u in reachable_nodes and v in reachable_nodes and G.has_edge(u, v)]
+        feasible = set(arc for arc, arc_feasible in zip(candidates, ESPPRC._feasible_arcs(G, candidates, table, self.source, self.target, self.max_res, res_name=res_name).tolist()) if arc_feasible)
+        for u, v in arcs:
+            if (u, v) in feasible:
+                touched.update((u, v))
+                H.add_edge(u, v)
+                H[u][v].clear()
+                H[u][v].update(G[u][v])
+            elif H.has_edge(u, v):
+                touched.update((u, v))
+                H.remove_edge(u, v)
+
+        # as in prune_graph, the pruned graph only contains nodes with edges
+        H.remove_nodes_from([node for node in touched if node in H and H.degree(node) == 0])
+        ESPPRC._check_pruned(H, self.source, self.target)
+
+        return len(nodes_added), len(nodes_removed), len(arcs)
@@ -0,0 +1,277 @@
+# Compact label storage for pylgrim:
+#   * LabelStore keeps the labels of GLSA for each node in a structured NumPy arena that grows geometrically.
+#     Each label holds its cost, its edge resources (optionally as float32), its node resources packed as bits and a pointer to the label it was extended from,
+#     so that the paths form a tree and are only built when they are needed.
+#     Labels that are dominated are marked as not alive instead of being removed, so that the position of a label in its arena never changes.
+#   * The labels of each node that are alive are also kept in an index sorted on their first resource, so that a new label is only compared to the labels that can dominate it,
+#     with at most the same first resource, or that it can dominate, with at least the same first resource.
+#     The index only holds the first resource and the slot of each label, and the labels that are compared are gathered from the arena by slot.
+#     This keeps the memory of the index at 12 bytes per label (16 without resources), about a third less peak label memory than a copy of the labels,
+#     at the price of the gathers, which make the labeling up to about 1.5 times slower on large instances.
+#   * Optionally, the dominance takes into account that a label cannot be extended back to the node it came from (2-cycle elimination):
+#     a label is then only dominated by a label with the same predecessor, or by labels with at least two different predecessors.
+#
+# Author:
+#   Toon Weyens
+
+import numpy as np
+
+class LabelStore:
+    """Labels for the nodes of a graph with {n_res} edge resources and {n_S} node resources.
+    The edge resources are stored with type {res_dtype}: np.float32 halves their memory, but makes the labeling approximate.
+    They are rounded down, so that a path can exceed the maximum resources by the rounding error, and a label can wrongly dominate a label whose resources are slightly smaller, which may then have been the only feasible one.
+    Check the resources of the returned path in float64 if they must be exact.
+    The arena of each node starts with {capacity} labels.
+    The index of each node holds the keys and slots of its labels that are alive, sorted on the key, which is the first edge resource (or the cost if there are none).
+    The labels that are compared are gathered from the arena by slot, which saves memory but takes more time than keeping copies of them in the index."""
+    def __init__(self, n_res, n_S, res_dtype=np.float64, capacity=4):
+        self.n_res = n_res
+        self.n_S = n_S
+        self.n_words = max(1, (n_S+63)//64)
+        self.dtype = np.dtype([
+            ('cost', np.float64),
+            ('res', res_dtype, (n_res,)),
+            ('bits', np.uint64, (self.n_words,)),
+            ('parent_node', np.int32),
+            ('parent_slot', np.int32),
+            ('alive', np.bool_),
+        ])
+        self.res_dtype = np.dtype(res_dtype)
+        self.capacity = capacity
+        self.nodes = list()
+        self.node_ids = dict()
+        self.arenas = list()
+        self.fields = list()
+        self.sizes = list()
+        self.indices = list()
+        self.index_sizes = list()
+        self.n_alive = 0
+        self.nbytes = 0
+
+    def _node_id(self, v):
+        node_id = self.node_ids.get(v)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self.node_ids[v] = node_id
+            self.nodes.append(v)
+            self.arenas.append(np.zeros(self.capacity, dtype=self.dtype))
+            self.fields.append(self._fields(self.arenas[node_id]))
+            self.sizes.append(0)
+            self.indices.append(self._new_index(self.capacity))
+            self.index_sizes.append(0)
+            self.nbytes += self.arenas[node_id].nbytes + self._index_nbytes(self.indices[node_id])
+        return node_id
+
+    def __contains__(self, v):
+        return v in self.node_ids
+
+    def add(self, v, cost, res, bits, parent=None):
+        """Add a label with cost {cost}, edge resources {res} and packed node resources {bits} to node {v}, extended from the label {parent} = (node, slot).
+        Returns the slot of the new label."""
+        node_id = self._node_id(v)
+        slot = self.sizes[node_id]
+        arena = self.arenas[node_id]
+        if slot == len(arena):
+            grown = np.zeros(2*len(arena), dtype=self.dtype)
+            grown[:slot] = arena
+            self.nbytes += grown.nbytes - arena.nbytes
+            arena = grown
+            self.arenas[node_id] = arena
+            self.fields[node_id] = self._fields(arena)
+            self._grow_index(node_id, len(arena))
+        label = arena[slot]
+        label['cost'] = cost
+        res = self.stored_res(res)
+        label['res'] = res
+        label['bits'] = bits
+        if parent is None:
+            pred = -1
+            label['parent_slot'] = -1
+        else:
+            pred = self.node_ids[parent[0]]
+            label['parent_slot'] = parent[1]
+        label['parent_node'] = pred
+        label['alive'] = True
+        self.sizes[node_id] = slot + 1
+        self.n_alive += 1
+        
+        # insert in the index after the labels with the same key
+        keys, slots = self.indices[node_id]
+        n = self.index_sizes[node_id]
+        key = self._key(cost, res)
+        i = int(np.searchsorted(keys[:n], key, side='right'))
+        keys[i+1:n+1] = keys[i:n]
+        keys[i] = key
+        slots[i+1:n+1] = slots[i:n]
+        slots[i] = slot
+        self.index_sizes[node_id] = n + 1
+        return slot
+
+    def _fields(self, arena):
+        """views of the fields of the arena {arena} that are compared for dominance"""
+        return arena['cost'], arena['res'], arena['bits'], arena['parent_node']
+
+    def _new_index(self, capacity):
+        return (np.zeros(capacity, dtype=self.res_dtype if self.n_res > 0 else np.float64), np.zeros(capacity, dtype=np.int32))
+
+    def _index_nbytes(self, index):
+        return sum(column.nbytes for column in index)
+
+    def _grow_index(self, node_id, capacity):
+        index = self.indices[node_id]
+        grown = self._new_index(capacity)
+        n = self.index_sizes[node_id]
+        for column, grown_column in zip(index, grown):
+            grown_column[:n] = column[:n]
+        self.nbytes += self._index_nbytes(grown) - self._index_nbytes(index)
+        self.indices[node_id] = grown
+
+    def _key(self, cost, res):
+        """key in the index of the label with cost {cost} and stored edge resources {res}"""
+        return res[0] if self.n_res > 0 else cost
+
+    def stored_res(self, res):
+        """edge resources {res} as stored, rounded down to the type of the store"""
+        stored = np.asarray(res, dtype=self.res_dtype)
+        if self.res_dtype != np.float64:
+            stored = np.where(stored > res, np.nextafter(stored, -np.inf), stored)
+        return stored
+
+    def get(self, v, slot):
+        """Label {slot} of node {v}, as a record with fields cost, res, bits, parent_node, parent_slot and alive."""
+        return self.arenas[self.node_ids[v]][slot]
+
+    def _used(self, v):
+        node_id = self.node_ids[v]
+        return self.arenas[node_id][:self.sizes[node_id]]
+
+    def _dominance(self, v, cost, res, bits, dominating):
+        """mask of the labels in the index of node {v} from position start that dominate ({dominating}) or that are dominated by the label with cost {cost}, resources {res} and node resources {bits}
+        Only the labels with at most ({dominating}) or at least the same key are compared. Identical labels do not dominate each other.
+        Returns (start, mask, slots), with the slots of the labels that are compared, or None if there are no such labels."""
+        node_id = self.node_ids[v]
+        keys, slots = self.indices[node_id]
+        n = self.index_sizes[node_id]
+        res = self.stored_res(res)
+        if dominating:
+            start = 0
+            stop = int(np.searchsorted(keys[:n], self._key(cost, res), side='right'))
+        else:
+            start = int(np.searchsorted(keys[:n], self._key(cost, res), side='left'))
+            stop = n
+        window = slots[start:stop]
+        arena_cost, arena_res, arena_bits, _ = self.fields[node_id]
+        costs = arena_cost[window]
+        if dominating:
+            mask = costs <= cost
+        else:
+            mask = costs >= cost
+        candidates = mask.nonzero()[0]
+        if len(candidates) == 0:
+            return None
+        # the resources are only gathered for the labels that pass the cheaper test on the cost
+        candidate_slots = window[candidates]
+        ress = arena_res[candidate_slots]
+        bitss = arena_bits[candidate_slots]
+        if dominating:
+            passed = (ress <= res).all(1) & ((bitss & ~bits) == 0).all(1)
+        else:
+            passed = (ress >= res).all(1) & ((bits & ~bitss) == 0).all(1)
+        passed &= ~((costs[candidates] == cost) & (ress == res).all(1) & (bitss == bits).all(1))
+        if not passed.any():
+            return None
+        mask[candidates] = passed
+        return start, mask, window
+
+    def is_dominated(self, v, cost, res, bits, pred=None):
+        """returns whether the label with cost {cost}, resources {res} and node resources {bits} is dominated by a label of node {v}
+        If the predecessor {pred} of the label is given, it is only dominated by a label with the same predecessor or by labels with two different predecessors."""
+        if v not in self.node_ids:
+            return False
+        dominance = self._dominance(v, cost, res, bits, True)
+        if dominance is None:
+            return False
+        start, mask, window = dominance
+        if pred is None:
+            return True
+        preds = self.fields[self.node_ids[v]][3][window[mask]]
+        if len(preds) == 0:
+            return False
+        return bool((preds == self.node_ids[pred]).any() or (preds != preds[0]).any())
+
+    def remove_dominated(self, v, cost, res, bits, pred=None):
+        """mark the labels of node {v} that are dominated by the label with cost {cost}, resources {res} and node resources {bits} as not alive
+        If the predecessor {pred} of the label is given, only the labels with the same predecessor are dominated.
+        returns their slots"""
+        if v not in self.node_ids:
+            return []
+        dominance = self._dominance(v, cost, res, bits, False)
+        if dominance is None:
+            return []
+        start, mask, window = dominance
+        node_id = self.node_ids[v]
+        keys, slots = self.indices[node_id]
+        n = self.index_sizes[node_id]
+        if pred is not None:
+            mask &= self.fields[node_id][3][window] == self.node_ids[pred]
+        if not mask.any():
+            return []
+        removed = window[mask]
+        self.arenas[node_id]['alive'][removed] = False
+        self.n_alive -= len(removed)
+        
+        # remove them from the index
+        n_kept = n - start - len(removed)
+        keys[start:start+n_kept] = keys[start:n][~mask]
+        slots[start:start+n_kept] = slots[start:n][~mask]
+        self.index_sizes[node_id] = start + n_kept
+        return removed.tolist()
+
+    def pack(self, node_res):
+        """pack the node resources {node_res}, nonzero for the nodes that are used, as bits"""
+        bits = np.zeros(self.n_words, dtype=np.uint64)
+        for i_S in np.flatnonzero(node_res).tolist():
+            bits[i_S//64] |= np.uint64(1) << np.uint64(i_S%64)
+        return bits
+
+    def unpack(self, bits):
+        """node resources as an array with ones for the nodes that are used, from the bits {bits}"""
+        i_S = np.arange(self.n_S)
+        return ((bits[i_S//64] >> (i_S%64).astype(np.uint64)) & np.uint64(1)).astype(float)
+
+    def with_bit(self, bits, i_S):
+        """copy of the bits {bits} with node resource {i_S} used"""
+        bits = bits.copy()
+        bits[i_S//64] |= np.uint64(1) << np.uint64(i_S%64)
+        return bits
+
+    def has_bit(self, bits, i_S):
+        """returns whether node resource {i_S} is used in the bits {bits}"""
+        return bool((bits[i_S//64] >> np.uint64(i_S%64)) & np.uint64(1))
+
+    def path(self, v, slot):
+        """path of label {slot} of node {v}, following the labels it was extended from"""
+        path = [v]
+        label = self.get(v, slot)
+        while label['parent_node'] >= 0:
+            v = self.nodes[label['parent_node']]
+            label = self.arenas[label['parent_node']][label['parent_slot']]
+            path.append(v)
+        path.reverse()
+        return path
+
+    def label(self, v, slot):
+        """label {slot} of node {v} as a tuple (cost, resources), where the resources are the edge resources followed by the node resources"""
+        label = self.get(v, slot)
+        return (float(label['cost']), np.concatenate((label['res'].astype(float), self.unpack(label['bits']))))
+
+    def slots(self, v):
+        """slots of the labels of node {v} that are alive, in the order in which they were added"""
+        if v not in self.node_ids:
+            return []
+        return np.flatnonzero(self._used(v)['alive']).tolist()
+
+    def paths_labels(self, v):
+        """paths and labels of node {v} that are alive, in the order in which they were added"""
+        slots = self.slots(v)
+        return [self.path(v, slot) for slot in slots], [self.label(v, slot) for slot in slots]
@@ -0,0 +1,77 @@
+# Statistics for pylgrim solvers:
+#   * SolverStats collects counters and timings of preprocess, GLSA, GSSA, TLAdynK and DLA when passed to them as {stats}.
+#   * An optional callback is called each time a solver finishes, e.g. to export the statistics to a metrics pipeline.
+#
+# Author:
+#   Toon Weyens
+
+class SolverStats:
+    """Statistics of one or more solver runs.
+    Pass the same instance to several solvers (e.g. preprocess and then GSSA) to accumulate their statistics.
+    The {callback}, if given, is called as callback(solver, stats) with the name of the solver each time a solver finishes."""
+    def __init__(self, callback=None):
+        self.callback = callback
+        # labels (GLSA) or paths (TLAdynK) stored
+        self.labels_created = 0
+        # new labels discarded because they were dominated
+        self.labels_dominated = 0
+        # stored labels removed because a new label dominated them
+        self.labels_removed = 0
+        # new labels discarded because they were unfeasible, keyed by resource index, 'node' for node resources and 'cycle' for cycles
+        self.labels_pruned = dict()
+        # maximum number of labels (GLSA) or nodes (TLAdynK) waiting to be extended
+        self.max_open = 0
+        # maximum number of labels stored at the same time and their size in bytes (of the label arenas and their indices for GLSA, approximate for the path trie of TLAdynK)
+        self.peak_labels = 0
+        self.peak_label_bytes = 0
+        # state space augmentation of GSSA
+        self.gssa_rounds = 0
+        self.S = list()
+        # dynamic memory of DLA
+        self.dla_rounds = 0
+        self.K = dict()
+        # wall time in seconds per phase ('prune', 'least_resource' and 'labeling') and per solver
+        self.times = dict()
+        # pruned graph size and arcs between the remaining nodes that were pruned because they cannot be on a feasible path
+        self.n_nodes = 0
+        self.n_edges = 0
+        self.arcs_pruned = 0
+
+    def __repr__(self):
+        return 'SolverStats({})'.format(', '.join('{}={}'.format(k, v) for k, v in self.as_dict().items()))
+
+    def as_dict(self):
+        """Statistics as a dictionary, without the callback."""
+        return {k: (dict(v) if isinstance(v, dict) else list(v) if isinstance(v, list) else v) for k, v in vars(self).items() if k != 'callback'}
+
+    def add_pruned(self, reason):
+        """Count a label that was discarded for reason {reason}."""
+        self.labels_pruned[reason] = self.labels_pruned.get(reason, 0) + 1
+
+    def add_time(self, phase, seconds):
+        """Add {seconds} of wall time to phase {phase}."""
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+
+    def update_peak(self, n_labels, n_bytes):
+        """Update the peak number of labels stored and their size."""
+        if n_labels > self.peak_labels:
+            self.peak_labels = n_labels
+        if n_bytes > self.peak_label_bytes:
+            self.peak_label_bytes = n_bytes
+
+    def merge(self, other):
+        """Add the counters and timings of the statistics {other}, e.g. of a solver run in another process, and take the maximum of the peaks."""
+        self.labels_created += other.labels_created
+        self.labels_dominated += other.labels_dominated
+        self.labels_removed += other.labels_removed
+        for reason, n in other.labels_pruned.items():
+            self.labels_pruned[reason] = self.labels_pruned.get(reason, 0) + n
+        self.max_open = max(self.max_open, other.max_open)
+        self.update_peak(other.peak_labels, other.peak_label_bytes)
+        for phase, seconds in other.times.items():
+            self.add_time(phase, seconds)
+
+    def finish(self, solver):
+        """Signal that solver {solver} finished, calling the callback if there is one."""
+        if self.callback is not None:
+            self.callback(solver, self)
@@ -0,0 +1,245 @@
+# Least-resource tables for pylgrim:
+#   * LeastResourceTable stores the least resource consumption between all pairs of nodes, for all resources, in one NumPy array.
+#     It can be used as the list of dictionaries of dictionaries that all_pairs_dijkstra_path_length gives for each resource, i.e. table[res][u][v].
+#     The table can be restricted to a subset of the nodes without copying, and repaired in place when an edge of the graph changes.
+#   * save_preprocessed and load_preprocessed store a preprocessed graph, in the CSR format of a compiled.CompiledGraph, and its table on disk as raw .npy arrays.
+#     These are memory-mapped when loaded, as a CompiledGraph, so that many processes can share one read-only copy.
+#
+# Author:
+#   Toon Weyens
+
+import os
+import pickle
+from collections.abc import Mapping
+import networkx as nx
+import numpy as np
+from .compiled import CompiledGraph
+
+# version of the on-disk format written by save_preprocessed
+_FORMAT_VERSION = 2
+
+class LeastResourceTable:
+    """Least resource consumption between all pairs of nodes for all resources.
+    The array {dist} has shape (n_res, n, n) and is infinite for pairs that are not connected.
+    The node {nodes}[i] corresponds to position {index}[nodes[i]] in the array, which is i by default.
+    The array can be larger than the number of nodes, e.g. when the table is {restricted} to a subset of the nodes."""
+    def __init__(self, dist, nodes, index=None, restricted=False):
+        self.dist = dist
+        self.nodes = list(nodes)
+        if index is None:
+            index = {n: i for i, n in enumerate(self.nodes)}
+        self.index = index
+        self.restricted = restricted
+        self._res_rows = [None] * dist.shape[0]
+
+    @classmethod
+    def from_graph(cls, G, res_name='res_cost', dtype=np.float64):
+        """Solve the all-pairs least resource problem on graph {G} for each resource {res_name}.
+        {G} can also be a compiled.CompiledGraph, whose resources are then used."""
+        if isinstance(G, CompiledGraph):
+            dist = np.empty((G.n_res, len(G), len(G)), dtype=dtype)
+            for res in range(0,G.n_res):
+                for i in range(0,len(G)):
+                    dist[res, i] = G.shortest_lengths(i, G.res[:, res])
+            return cls(dist, G.nodes, dict(G.index))
+        nodes = list(G.nodes())
+        index = {n: i for i, n in enumerate(nodes)}
+        n_res = G.graph['n_res']
+        dist = np.full((n_res, len(nodes), len(nodes)), np.inf, dtype=dtype)
+        for res in range(0,n_res):
+            for u, lengths in nx.all_pairs_dijkstra_path_length(G, weight=_res_cost_i(res_name, res)):
+                row = dist[res, index[u]]
+                for v, length in lengths.items():
+                    row[index[v]] = length
+        return cls(dist, nodes, index)
+
+    def __len__(self):
+        return self.dist.shape[0]
+
+    def __getitem__(self, res):
+        if self._res_rows[res] is None:
+            self._res_rows[res] = _ResourceRows(self, res)
+        return self._res_rows[res]
+
+    def __iter__(self):
+        for res in range(0,len(self)):
+            yield self[res]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_res_rows'] = [None] * len(self)
+        return state
+
+    def positions(self, nodes):
+        """Array positions of the nodes {nodes}."""
+        return np.fromiter((self.index[n] for n in nodes), dtype=np.intp, count=len(nodes))
+
+    def restrict(self, nodes):
+        """Table for the subset {nodes} of the nodes, sharing the array with this table."""
+        nodes = list(nodes)
+        return LeastResourceTable(self.dist, nodes, {n: self.index[n] for n in nodes}, restricted=True)
+
+    def add_node(self, n):
+        """Add an isolated node {n} to the table.
+        The array grows geometrically, so that adding many nodes one by one is cheap on average.
+        A restricted table shares its array with the table it was restricted from, and cannot be extended."""
+        if self.restricted:
+            raise ValueError('cannot add nodes to a restricted table')
+        pos = len(self.nodes)
+        if pos >= self.dist.shape[1]:
+            size = max(2*self.dist.shape[1], 1)
+            dist = np.full((self.dist.shape[0], size, size), np.inf, dtype=self.dist.dtype)
+            dist[:, :pos, :pos] = self.dist[:, :pos, :pos]
+            self.dist = dist
+            self._res_rows = [None] * len(self)
+        self.dist[:, pos, :] = np.inf
+        self.dist[:, :, pos] = np.inf
+        self.dist[:, pos, pos] = 0.0
+        self.nodes.append(n)
+        self.index[n] = pos
+
+    def update_edge(self, G, u, v, res_old, res_new, res_name='res_cost'):
+        """Repair the table in place after the resources of the edge {u} -> {v} of graph {G} changed from {res_old} to {res_new}.
+        A value of None means that the edge did not exist before or does not exist anymore, and {G} must already contain the change.
+        Where a resource decreased, only the pairs that become shorter through the edge are updated.
+        Where it increased, only the sources whose least resource path to {v} may have used the edge are recalculated.
+        Returns the number of entries that decreased and of sources that were recalculated."""
+        inf = np.inf
+        iu = self.index[u]
+        iv = self.index[v]
+        n_decreased = 0
+        n_recalculated = 0
+        for res in range(0,len(self)):
+            c_old = inf if res_old is None else float(res_old[res])
+            c_new = inf if res_new is None else float(res_new[res])
+            D = self.dist[res]
+            if c_new < c_old:
+                # only sources that get closer to v and targets that get closer from u can improve
+                via_u = D[:, iu] + c_new
+                rows = np.flatnonzero(via_u < D[:, iv])
+                cols = np.flatnonzero(c_new + D[iv, :] < D[iu, :])
+                if len(rows) > 0 and len(cols) > 0:
+                    block = D[np.ix_(rows, cols)]
+                    new_block = via_u[rows][:, None] + D[iv, cols][None, :]
+                    improved = new_block < block
+                    n_decreased += int(np.count_nonzero(improved))
+                    D[np.ix_(rows, cols)] = np.where(improved, new_block, block)
+            elif c_new > c_old:
+                # sources of which a least resource path to v may have used the edge
+                via_u = D[:, iu] + c_old
+                rows = np.flatnonzero(np.isfinite(via_u) & (via_u <= D[:, iv] + 1e-12*np.abs(D[:, iv])))
+                res_cost_i = _res_cost_i(res_name, res)
+                for x in rows.tolist():
+                    D[x, :] = inf
+                    for y, length in nx.single_source_dijkstra_path_length(G, self.nodes[x], weight=res_cost_i).items():
+                        D[x, self.index[y]] = length
+                n_recalculated += len(rows)
+        return n_decreased, n_recalculated
+
+
+class _ResourceRows(Mapping):
+    """Least resource {res} from each node of table {table}, as a mapping from node to _ResourceRow."""
+    def __init__(self, table, res):
+        self._table = table
+        self._res = res
+        self._rows = dict()
+
+    def __getitem__(self, u):
+        row = self._rows.get(u)
+        if row is None:
+            row = _ResourceRow(self._table, self._table.dist[self._res, self._table.index[u]])
+            self._rows[u] = row
+        return row
+
+    def __contains__(self, u):
+        return u in self._table.index
+
+    def __iter__(self):
+        return iter(self._table.nodes)
+
+    def __len__(self):
+        return len(self._table.nodes)
+
+
+class _ResourceRow(Mapping):
+    """Least resource {row} from one node to the nodes of table {table} that can be reached."""
+    def __init__(self, table, row):
+        self._index = table.index
+        self._nodes = table.nodes
+        self._row = row
+
+    def get(self, v, default=None):
+        i = self._index.get(v)
+        if i is None:
+            return default
+        d = self._row[i]
+        if d == np.inf:
+            return default
+        return float(d)
+
+    def __getitem__(self, v):
+        d = self.get(v)
+        if d is None:
+            raise KeyError(v)
+        return d
+
+    def __contains__(self, v):
+        return self.get(v) is not None
+
+    def __iter__(self):
+        for v in self._nodes:
+            if self._row[self._index[v]] < np.inf:
+                yield v
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def save_preprocessed(directory, H, res_min, res_name='res_cost'):
+    """Save a preprocessed graph {H}, a NetworkX graph or a compiled.CompiledGraph, with its least resource table {res_min} to the directory {directory}.
+    The graph is saved in the CSR format of a CompiledGraph, with its weight and resources {res_name}, and the table as raw .npy arrays, the node labels are pickled.
+    Other edge and graph attributes are not saved."""
+    if not isinstance(res_min, LeastResourceTable):
+        raise TypeError('res_min must be a LeastResourceTable')
+    if not isinstance(H, CompiledGraph):
+        H = CompiledGraph.from_networkx(H, res_name=res_name)
+    os.makedirs(directory, exist_ok=True)
+
+    # table in the order of the nodes of the graph
+    positions = res_min.positions(H.nodes)
+    np.save(os.path.join(directory, 'indptr.npy'), np.asarray(H.indptr, dtype=np.intp))
+    np.save(os.path.join(directory, 'heads.npy'), np.asarray(H.heads, dtype=np.intp))
+    np.save(os.path.join(directory, 'weight.npy'), np.asarray(H.weight, dtype=np.float64))
+    np.save(os.path.join(directory, 'res_cost.npy'), np.asarray(H.res, dtype=np.float64))
+    np.save(os.path.join(directory, 'res_min.npy'), res_min.dist[:, positions][:, :, positions])
+    with open(os.path.join(directory, 'meta.pkl'), 'wb') as f:
+        pickle.dump({'version': _FORMAT_VERSION, 'nodes': list(H.nodes), 'res_name': H.res_name, 'n_res': H.n_res}, f)
+
+def load_preprocessed(directory, mmap_mode='r'):
+    """Load a preprocessed graph and its least resource table saved with save_preprocessed in the directory {directory}.
+    The arrays are memory-mapped with {mmap_mode} (None to read them into memory), so that the operating system shares them between processes.
+    As the node labels are pickled, only load directories that you trust.
+    Returns the graph, as a compiled.CompiledGraph on the memory-mapped arrays, and the table, as preprocess does."""
+    with open(os.path.join(directory, 'meta.pkl'), 'rb') as f:
+        meta = pickle.load(f)
+    if meta['version'] != _FORMAT_VERSION:
+        raise ValueError('unsupported format version {} in {}'.format(meta['version'], directory))
+    nodes = meta['nodes']
+
+    arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode) for name in ('indptr', 'heads', 'weight', 'res_cost', 'res_min')}
+    H = CompiledGraph(nodes, arrays['indptr'], arrays['heads'], arrays['weight'], arrays['res_cost'], meta['n_res'], res_name=meta['res_name'])
+
+    return H, LeastResourceTable(arrays['res_min'], nodes)
+
+def _res_cost_i(res_name, res):
+    """returns a function that gives the weight of certain resource with index {res} of an edge, given by the edge attribute {res_name}.
+    It is used by all_pairs_dijkstra_path_length:
+        'The weight of an edge is the value returned by the function.
+        The function must accept exactly three positional arguments: the two endpoints of an edge and the dictionary of edge attributes for that edge.
+        The function must return a number.'
+    The resource is bound in a closure rather than in a module variable, so that graphs can be preprocessed concurrently."""
+
+    def res_cost_i(u, v, e):
+        return e[res_name][res]
+
+    return res_cost_i
@@ -1,5 +1,7 @@
 # Tools for pylgrim:
 #   * decouple_source and undecouple_source to move all in-edges from a source node to a duplicate and vice versa.
+#   * decoupled_view to obtain the same decoupling as a read-only view, without touching the graph.
+#   * CancelToken to cancel a running solver from another thread or process, which then raises Cancelled.
 #   * print_path to pretty print a path.
 #   * count_elems to count the number of elements in a path and return a dictionary keyed with a label.
 #   * print_dynamic_k to dynamically print K values as bars in the terminal.
@@ -10,6 +12,11 @@
 import logging
 import sys
 import shutil
+import threading
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+import networkx as nx
 
 #logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -52,6 +59,145 @@ def undecouple_source(G, source, source_in="source_in"):
     return n_in_edges_source
 
 
+def decoupled_view(G, source, source_in="source_in"):
+    """Read-only view of graph {G} in which the source {source} is decoupled as in decouple_source, i.e. all its in-edges point to a node {source_in} instead.
+    Nothing is copied or moved: the nodes, edges and attribute dictionaries of {G} are shared, so that many sources can be solved against the same graph at the same time.
+    As for any NetworkX view, {G} should not be modified while the view is in use."""
+    
+    if source not in G:
+        raise nx.NetworkXError('source {} not in graph'.format(source))
+    if source_in in G:
+        raise nx.NetworkXError('node {} already in graph'.format(source_in))
+    
+    H = nx.freeze(nx.DiGraph())
+    H._graph = G
+    H.graph = G.graph
+    H._node = _DecoupledNodes(G, source, source_in)
+    H._succ = _DecoupledSucc(G, source, source_in)
+    H._pred = _DecoupledPred(G, source, source_in)
+    
+    return H
+
+
+# empty adjacency of source_in (no out-edges) and source (no in-edges) in a decoupled view
+_NO_NEIGHBORS = MappingProxyType({})
+
+
+class _DecoupledNodes(Mapping):
+    """Node attributes of a decoupled view: those of {G} plus {source_in} if {source} has in-edges."""
+    def __init__(self, G, source, source_in):
+        self._G = G
+        self._source = source
+        self._source_in = source_in
+        self._source_in_attr = MappingProxyType({})
+    
+    def _has_source_in(self):
+        return len(self._G._pred[self._source]) > 0
+    
+    def __getitem__(self, n):
+        if n == self._source_in and self._has_source_in():
+            return self._source_in_attr
+        return self._G._node[n]
+    
+    def __contains__(self, n):
+        if n == self._source_in:
+            return self._has_source_in()
+        return n in self._G._node
+    
+    def __iter__(self):
+        yield from self._G._node
+        if self._has_source_in():
+            yield self._source_in
+    
+    def __len__(self):
+        return len(self._G._node) + self._has_source_in()
+
+
+class _DecoupledSucc(_DecoupledNodes):
+    """Successors of a decoupled view: edges to {source} are redirected to {source_in}."""
+    def __getitem__(self, u):
+        if u == self._source_in and self._has_source_in():
+            return _NO_NEIGHBORS
+        nbrs = self._G._succ[u]
+        if self._source in nbrs:
+            return _RedirectedNeighbors(nbrs, self._source, self._source_in)
+        return nbrs
+
+
+class _DecoupledPred(_DecoupledNodes):
+    """Predecessors of a decoupled view: in-edges of {source} belong to {source_in}."""
+    def __getitem__(self, v):
+        if v == self._source_in and self._has_source_in():
+            return self._G._pred[self._source]
+        if v == self._source:
+            return _NO_NEIGHBORS
+        return self._G._pred[v]
+
+
+class _RedirectedNeighbors(Mapping):
+    """Neighbors {nbrs} of a node, with neighbor {old} renamed to {new}."""
+    def __init__(self, nbrs, old, new):
+        self._nbrs = nbrs
+        self._old = old
+        self._new = new
+    
+    def __getitem__(self, n):
+        if n == self._new:
+            return self._nbrs[self._old]
+        if n == self._old:
+            raise KeyError(n)
+        return self._nbrs[n]
+    
+    def __contains__(self, n):
+        if n == self._new:
+            return self._old in self._nbrs
+        if n == self._old:
+            return False
+        return n in self._nbrs
+    
+    def __iter__(self):
+        for n in self._nbrs:
+            yield self._new if n == self._old else n
+    
+    def __len__(self):
+        return len(self._nbrs)
+
+
+class Cancelled(Exception):
+    """Raised by a solver that was cancelled through its CancelToken."""
+
+
+class CancelToken:
+    """Token to cancel a running solver cooperatively, e.g. from another thread.
+    The solvers that accept a {cancel} token check it in their main loop and raise Cancelled once it is cancelled.
+    Optionally, the token uses the {event} given, e.g. a multiprocessing.Event to cancel solvers in other processes.
+    If {interval} is positive, check only looks at the event once per {interval} seconds, for events that are slow to query, such as those of a multiprocessing.Manager."""
+    def __init__(self, event=None, interval=0.0):
+        if event is None:
+            event = threading.Event()
+        self._event = event
+        self._interval = interval
+        self._next_check = 0.0
+
+    def cancel(self):
+        """Request the solver to stop."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Raise Cancelled if the token has been cancelled."""
+        if self._interval > 0:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self._interval
+        if self._event.is_set():
+            raise Cancelled('solver cancelled')
+
+
 def print_path(path, max_path_len_for_print = None):
     """Pretty-print a path given as an iterable of strings.
     Optionally trim if longer than max_path_len_for_print
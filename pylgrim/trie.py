@@ -0,0 +1,121 @@
+# Shared-prefix path storage for pylgrim:
+#   * PathTrie stores paths as entries of a prefix tree, so that the K paths of DLA to each node share the prefixes they have in common instead of each being a list of nodes.
+#     Each entry holds its last node, the entry of the path without it and the nodes on the path as bits of an integer,
+#     so that a path is extended by one node, and tested for containing a node, without copying it.
+#   * A path has exactly one entry, so that equal paths have equal entries.
+#   * The entries are reference counted: an entry that is no longer held by its caller or by a longer path is freed, and its slot is reused,
+#     so that the memory stays proportional to the paths that are held.
+#   * The nodes get their bits in the order in which they are first added, and the bits of an entry are a Python integer up to the highest bit of the nodes on its path.
+#     In a graph with n nodes, an entry can therefore take up to n/8 bytes for its bits, so that the memory per entry only stays flat for paths through the first nodes seen.
+#
+# Author:
+#   Toon Weyens
+
+import sys
+
+# approximate size of an entry besides its bits: a slot in each list and an item in the dictionary of children
+_ENTRY_BYTES = 4*8 + 3*8 + 64
+
+class PathTrie:
+    """Paths that share their prefixes, as entries of a prefix tree.
+    The path of entry i ends in node[i], after the path of entry parent[i] (-1 for a path with only one node), and contains the nodes with bits set in bits[i].
+    An entry is held by the caller that created it, and by the entries that extend it, and is freed when it is released by all of them."""
+    def __init__(self):
+        self.node = list()
+        self.parent = list()
+        self.bits = list()
+        self.refs = list()
+        self.children = dict()
+        self.free = list()
+        self.bit = dict()
+        self.n_entries = 0
+        self.nbytes = 0
+
+    def _node_bit(self, v):
+        bit = self.bit.get(v)
+        if bit is None:
+            bit = len(self.bit)
+            self.bit[v] = bit
+        return bit
+
+    def _new(self, v, parent, bits):
+        if self.free:
+            i = self.free.pop()
+            self.node[i] = v
+            self.parent[i] = parent
+            self.bits[i] = bits
+            self.refs[i] = 1
+        else:
+            i = len(self.node)
+            self.node.append(v)
+            self.parent.append(parent)
+            self.bits.append(bits)
+            self.refs.append(1)
+        self.children[(parent, v)] = i
+        self.n_entries += 1
+        self.nbytes += _ENTRY_BYTES + sys.getsizeof(bits)
+        return i
+
+    def root(self, v):
+        """entry of the path with only node {v}, held by the caller"""
+        return self.extend(-1, v)
+
+    def find(self, i, v):
+        """entry of the path of entry {i} extended with node {v} if it exists, else None"""
+        return self.children.get((i, v))
+
+    def extend(self, i, v):
+        """entry of the path of entry {i} (-1 for none) extended with node {v}, held by the caller"""
+        j = self.children.get((i, v))
+        if j is not None:
+            self.refs[j] += 1
+            return j
+        bits = 1 << self._node_bit(v)
+        if i >= 0:
+            bits |= self.bits[i]
+            self.refs[i] += 1
+        return self._new(v, i, bits)
+
+    def extend_nodes(self, i, nodes):
+        """entry of the path of entry {i} (-1 for none) extended with the nodes {nodes} in order, held by the caller"""
+        j = i
+        for v in nodes:
+            k = self.extend(j, v)
+            if j != i:
+                self.release(j)
+            j = k
+        if j == i and i >= 0:
+            self.refs[i] += 1
+        return j
+
+    def release(self, i):
+        """release the entry {i} held by the caller, freeing it and the entries it extends that are no longer held"""
+        while i >= 0:
+            self.refs[i] -= 1
+            if self.refs[i] > 0:
+                return
+            parent = self.parent[i]
+            del self.children[(parent, self.node[i])]
+            self.nbytes -= _ENTRY_BYTES + sys.getsizeof(self.bits[i])
+            self.bits[i] = 0
+            self.node[i] = None
+            self.free.append(i)
+            self.n_entries -= 1
+            i = parent
+
+    def contains(self, i, v):
+        """returns whether the path of entry {i} contains node {v}"""
+        bit = self.bit.get(v)
+        return bit is not None and (self.bits[i] >> bit) & 1 == 1
+
+    def nodes(self, i):
+        """nodes of the path of entry {i} in order"""
+        nodes = list()
+        while i >= 0:
+            nodes.append(self.node[i])
+            i = self.parent[i]
+        nodes.reverse()
+        return nodes
+
+    def __len__(self):
+        return self.n_entries
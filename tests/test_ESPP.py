@@ -38,5 +38,21 @@ def test_ESPP_run():
     pylgrim.tools.undecouple_source(G, source, source_in=source_in)
 
 
+def test_ESPP_arrays_run():
+    # the graph given as edge arrays gives the same costs, for the same node labels
+    G = testtools.create_test_graph()
+    nodes = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+    edges = list(G.edges(data=True))
+    G_arrays = pylgrim.compiled.CompiledGraph.from_arrays([index[u] for u, v, e in edges], [index[v] for u, v, e in edges], [e['weight'] for u, v, e in edges], [e['res_cost'] for u, v, e in edges], nodes=nodes)
+    paths, costs = pylgrim.ESPP.DLA(G, 0)
+    paths_arrays, costs_arrays = pylgrim.ESPP.DLA(G_arrays, 0)
+    assert costs_arrays == costs
+    for node in nodes:
+        assert [list(path.edges()) for path in paths_arrays[node]] == [list(path.edges()) for path in paths[node]]
+
+
+
 if __name__ == "__main__":
-    test_ESPP_run() 
\ No newline at end of file
+    test_ESPP_run()
+    test_ESPP_arrays_run() 
\ No newline at end of file
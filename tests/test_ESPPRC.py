@@ -66,5 +66,216 @@ def test_ESPPRC_run():
     pylgrim.tools.undecouple_source(G, source, source_in=source_in)
 
 
+def test_ESPPRC_no_log_formatting(monkeypatch):
+    # with logging above DEBUG, no time should be spent formatting paths
+    n_calls = [0]
+    print_path = pylgrim.tools.print_path
+    def counting_print_path(*args, **kwargs):
+        n_calls[0] += 1
+        return print_path(*args, **kwargs)
+    monkeypatch.setattr(pylgrim.tools, 'print_path', counting_print_path)
+
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    G_view = pylgrim.tools.decoupled_view(G, source, source_in=source_in)
+    max_res = list([1.0,1.0])
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G_view, source, source_in, max_res, res_name=res_name)
+    pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min, res_name=res_name)
+    pylgrim.ESPP.DLA(G_view, source)
+    assert n_calls[0] == 0
+
+
+def test_ESPPRC_batch_run():
+    # preprocess all targets of the source at once and compare with preprocessing each of them
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    G_view = pylgrim.tools.decoupled_view(G, source, source_in=source_in)
+    max_res = list([1.0,1.0])
+    pairs = [(source, target) for target in G_view.nodes() if target != source]
+    preprocessed = pylgrim.ESPPRC.preprocess_batch(G_view, pairs, max_res, res_name=res_name)
+    assert list(preprocessed) == pairs
+    for (source, target), (G_pre, res_min) in preprocessed.items():
+        G_single, res_min_single = pylgrim.ESPPRC.preprocess(G_view, source, target, max_res, res_name=res_name)
+        assert set(G_pre.edges()) == set(G_single.edges())
+        assert res_min.dist is preprocessed[pairs[0]][1].dist
+        batch_path, batch_label = pylgrim.ESPPRC.GSSA(G_pre, source, target, max_res, res_min, res_name=res_name)
+        single_path, single_label = pylgrim.ESPPRC.GSSA(G_single, source, target, max_res, res_min_single, res_name=res_name)
+        print('shortest path to {} found: {} with label {}'.format(target, batch_path, batch_label))
+        assert batch_label[0] == single_label[0]
+
+def test_ESPPRC_batch_in_edges_run():
+    # sources with in-edges are decoupled for each pair, while the table of the whole graph is shared
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    max_res = list([1.0,1.0])
+    pairs = [(0, 6), (1, 6), (4, 0)]
+    assert all(G.in_degree(source) > 0 for source, _ in pairs)
+    preprocessed = pylgrim.ESPPRC.preprocess_batch(G, pairs, max_res, res_name=res_name)
+    for (source, target), (G_pre, res_min) in preprocessed.items():
+        assert G_pre.in_degree(source) == 0
+        G_view = pylgrim.tools.decoupled_view(G, source)
+        G_single, res_min_single = pylgrim.ESPPRC.preprocess(G_view, source, target, max_res, res_name=res_name)
+        assert set(G_pre.edges()) >= set(G_single.edges())
+        batch_path, batch_label = pylgrim.ESPPRC.GSSA(G_pre, source, target, max_res, res_min, res_name=res_name)
+        single_path, single_label = pylgrim.ESPPRC.GSSA(G_single, source, target, max_res, res_min_single, res_name=res_name)
+        print('shortest path from {} to {} found: {} with label {}'.format(source, target, batch_path, batch_label))
+        assert batch_label[0] == single_label[0]
+
+
+def test_ESPPRC_iter_run():
+    # the anytime variant of GSSA yields improving elementary paths and ends with the result of GSSA
+    from benchmarks.generators import random_graph
+    G, source, target, max_res = random_graph(16, density=0.4, n_res=1, tightness=0.6, seed=3)
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, target, max_res, res_name=res_name)
+    shortest_path, shortest_path_label = pylgrim.ESPPRC.GSSA(G_pre, source, target, max_res, res_min, res_name=res_name)
+
+    results = list(pylgrim.ESPPRC.GSSA_iter(G_pre, source, target, max_res, res_min, res_name=res_name))
+    assert len(results) > 1
+    for (path, label, lower_bound), (path_next, label_next, lower_bound_next) in zip(results[:-1], results[1:]):
+        print('path found: {} with cost {} and lower bound {}'.format(path, label[0], lower_bound))
+        assert all(label[1][0:G.graph['n_res']] <= max_res)
+        assert label_next[0] < label[0]
+        assert lower_bound <= lower_bound_next <= label_next[0]
+    path, label, lower_bound = results[-1]
+    assert path == shortest_path
+    assert label[0] == lower_bound == shortest_path_label[0]
+
+    # a path that is found before it is known to be optimal is yielded again at the end, with the final bound and label
+    G, source, target, max_res = random_graph(6, density=0.4, n_res=1, tightness=1.0, seed=6)
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, target, max_res, res_name=res_name)
+    stats = pylgrim.stats.SolverStats()
+    shortest_path, shortest_path_label = pylgrim.ESPPRC.GSSA(G_pre, source, target, max_res, res_min, res_name=res_name, stats=stats)
+    results = list(pylgrim.ESPPRC.GSSA_iter(G_pre, source, target, max_res, res_min, res_name=res_name))
+    assert len(set(tuple(path.nodes()) for path, _, _ in results[:-1])) == len(results) - 1
+    assert results[-2][0] == results[-1][0]
+    path, label, lower_bound = results[-1]
+    assert path == shortest_path
+    assert label[0] == lower_bound == shortest_path_label[0]
+    assert len(label[1]) == len(shortest_path_label[1]) == G.graph['n_res'] + len(stats.S)
+
+
+def test_ESPPRC_batch_extension_run():
+    # extending labels to all children at once gives the same labels as extending them edge by edge
+    from benchmarks.generators import solomon_graph
+    G, source, target, max_res = solomon_graph(20, density=0.9, n_res=2, tightness=0.15, seed=1)
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, target, max_res, res_name=res_name)
+    results = list()
+    for batch_degree in (1, len(G_pre)):
+        stats = pylgrim.stats.SolverStats()
+        path, label = pylgrim.ESPPRC.GSSA(G_pre, source, target, max_res, res_min, res_name=res_name, stats=stats, batch_degree=batch_degree)
+        print('shortest path found with batch degree {}: {} with label {}'.format(batch_degree, path, label))
+        results.append((list(path.nodes()), label[0], stats.labels_created, stats.labels_pruned))
+    assert results[0] == results[1]
+
+
+def test_ESPPRC_speculative_run():
+    # trying several augmentations at once in worker processes gives the same optimal cost in fewer rounds
+    from benchmarks.generators import random_graph
+    G, source, target, max_res = random_graph(16, 0.4, 1, 0.6, seed=3)
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, target, max_res)
+    stats = pylgrim.stats.SolverStats()
+    path, label = pylgrim.ESPPRC.GSSA(G_pre, source, target, max_res, res_min, stats=stats)
+    stats_spec = pylgrim.stats.SolverStats()
+    path_spec, label_spec = pylgrim.ESPPRC.GSSA(G_pre, source, target, max_res, res_min, stats=stats_spec, speculative=True, max_workers=2)
+    print('shortest path found: {} with cost {} in {} rounds, speculatively {} with cost {} in {} rounds'.format(path, label[0], stats.gssa_rounds, path_spec, label_spec[0], stats_spec.gssa_rounds))
+    assert label_spec[0] == label[0]
+    assert max(pylgrim.tools.count_elems(list(path_spec.nodes())).values()) == 1
+    assert stats_spec.gssa_rounds <= stats.gssa_rounds
+
+
+def test_ESPPRC_arc_pruning_run():
+    # the arc a -> b lies between nodes that are both on feasible paths, but no feasible path can use it
+    import networkx as nx
+    import numpy as np
+    G = nx.DiGraph(n_res=1)
+    for u, v, weight, res in [('s', 'a', 1, 1.0), ('a', 't', 1, 1.0), ('s', 'b', 1, 1.0), ('b', 't', 1, 1.0), ('a', 'b', -5, 1.5)]:
+        G.add_edge(u, v, weight=weight, res_cost=np.array([res]))
+    max_res = [2.0]
+    for prune in ('prune_graph', 'table'):
+        stats = pylgrim.stats.SolverStats()
+        if prune == 'prune_graph':
+            H = pylgrim.ESPPRC.prune_graph(G, 's', 't', max_res, stats=stats)
+        else:
+            table = pylgrim.ESPPRC.setup_least_resource_paths_ESPPRC(G)
+            H = pylgrim.ESPPRC.prune_graph_with_table(G, 's', 't', max_res, table, stats=stats)
+        print('{}: pruned {} arcs, keeping {}'.format(prune, stats.arcs_pruned, sorted(H.edges())))
+        assert set(H.nodes()) == set(['s', 'a', 'b', 't'])
+        assert not H.has_edge('a', 'b')
+        assert stats.arcs_pruned == 1
+
+
+def test_ESPPRC_2_cycles_run():
+    # eliminating 2-cycles in the labeling gives the same optimal path in fewer rounds
+    from benchmarks.generators import solomon_graph
+    G, source, target, max_res = solomon_graph(14, density=0.4, n_res=2, tightness=0.6, seed=0)
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, target, max_res)
+    results = list()
+    for eliminate_2_cycles in (False, True):
+        stats = pylgrim.stats.SolverStats()
+        path, label = pylgrim.ESPPRC.GSSA(G_pre, source, target, max_res, res_min, stats=stats, eliminate_2_cycles=eliminate_2_cycles)
+        print('shortest path found {} 2-cycle elimination: {} with cost {} in {} rounds'.format('with' if eliminate_2_cycles else 'without', path, label[0], stats.gssa_rounds))
+        results.append((label[0], stats.gssa_rounds))
+    assert results[0][0] == results[1][0]
+    assert results[1][1] < results[0][1]
+
+def test_ESPPRC_arrays_run():
+    # the graph given as edge arrays or as a CSR triple gives the same path, in terms of the same node labels
+    import numpy as np
+    import networkx as nx
+    import pytest
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    pylgrim.tools.decouple_source(G, source, source_in=source_in)
+    nodes = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+    edges = list(G.edges(data=True))
+    sources = [index[u] for u, v, e in edges]
+    targets = [index[v] for u, v, e in edges]
+    weight = [e['weight'] for u, v, e in edges]
+    res = np.array([e[res_name] for u, v, e in edges])
+    G_arrays = pylgrim.compiled.CompiledGraph.from_arrays(sources, targets, weight, res, nodes=nodes)
+    G_csr = pylgrim.compiled.CompiledGraph.from_csr(G_arrays.indptr, G_arrays.heads, G_arrays.weight, G_arrays.res, nodes=nodes)
+    
+    max_res = [1.0, 1.0]
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, source_in, max_res)
+    path, label = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min)
+    for G_compiled in (G_arrays, G_csr):
+        G_compiled_pre, res_min_compiled = pylgrim.ESPPRC.preprocess(G_compiled, source, source_in, max_res)
+        assert set(G_compiled_pre.nodes) == set(G_pre.nodes())
+        assert G_compiled_pre.number_of_edges() == G_pre.number_of_edges()
+        path_compiled, label_compiled = pylgrim.ESPPRC.GSSA(G_compiled_pre, source, source_in, max_res, res_min_compiled)
+        print('shortest path found from arrays: {} with label {}'.format(path_compiled, label_compiled))
+        assert list(path_compiled.edges()) == list(path.edges())
+        assert label_compiled[0] == label[0]
+        assert np.allclose(label_compiled[1], label[1])
+
+    # invalid arrays are rejected up front
+    from_arrays = pylgrim.compiled.CompiledGraph.from_arrays
+    for arrays in (
+            (sources, targets, weight[:-1], res),
+            (sources, targets, weight, res[:-1]),
+            (sources[:-1] + [len(nodes)], targets[:-1], weight[:-1], res[:-1]),
+            (sources, [-1] + targets[1:], weight, res)):
+        with pytest.raises(ValueError):
+            from_arrays(*arrays, nodes=nodes)
+    from_csr = pylgrim.compiled.CompiledGraph.from_csr
+    for indptr, heads, csr_nodes in (
+            (G_arrays.indptr[::-1], G_arrays.heads, nodes),
+            (G_arrays.indptr, G_arrays.heads[:-1], nodes),
+            (G_arrays.indptr, G_arrays.heads, nodes[:-1])):
+        with pytest.raises(ValueError):
+            from_csr(indptr, heads, G_arrays.weight[:len(heads)], G_arrays.res[:len(heads)], nodes=csr_nodes)
+
+    # a graph without edges has no path
+    for G_empty in (
+            pylgrim.compiled.CompiledGraph.from_arrays([], [], [], np.zeros((0, 2)), nodes=[source, source_in]),
+            pylgrim.compiled.CompiledGraph.from_csr([0, 0, 0], [], [], [], nodes=[source, source_in], n_res=2)):
+        assert G_empty.n_res == 2 and G_empty.number_of_edges() == 0
+        with pytest.raises(nx.NetworkXNoPath):
+            pylgrim.ESPPRC.preprocess(G_empty, source, source_in, max_res)
+
+
 if __name__ == "__main__":
     test_ESPPRC_run()
\ No newline at end of file
@@ -0,0 +1,138 @@
+# test the asyncio entry points, the cancellation of solvers and the exceptions raised instead of exiting.
+import pylgrim
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import networkx as nx
+import pytest
+import tools as testtools
+
+# possible values are: WARNING, INFO, DEBUG, ...
+# (see https://docs.python.org/3/library/logging.html#logging-levels)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def test_aio_run():
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    G_view = pylgrim.tools.decoupled_view(G, source, source_in=source_in)
+    max_res = list([1.0,1.0])
+
+    async def solve():
+        G_pre, res_min = await pylgrim.aio.preprocess(G_view, source, source_in, max_res)
+        return await asyncio.gather(
+            pylgrim.aio.GSSA(G_pre, source, source_in, max_res, res_min),
+            pylgrim.aio.DLA(G_view, source))
+    (aio_path, aio_label), (aio_paths, aio_costs) = asyncio.run(solve())
+
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G_view, source, source_in, max_res)
+    shortest_path, shortest_path_label = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min)
+    paths, costs = pylgrim.ESPP.DLA(G_view, source)
+    assert aio_label[0] == shortest_path_label[0]
+    assert aio_costs == costs
+
+def test_aio_process_pool_run():
+    # the solvers run in a process pool without a cancel token, which cannot be pickled
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    pylgrim.tools.decouple_source(G, source, source_in='source_in')
+    max_res = list([1.0,1.0])
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, 6, max_res)
+    shortest_path, shortest_path_label = pylgrim.ESPPRC.GSSA(G_pre, source, 6, max_res, res_min)
+    paths, costs = pylgrim.ESPP.DLA(G, source)
+
+    async def solve(executor):
+        G_pre, res_min = await pylgrim.aio.preprocess(G, source, 6, max_res, executor=executor)
+        return await asyncio.gather(
+            pylgrim.aio.GSSA(G_pre, source, 6, max_res, res_min, executor=executor),
+            pylgrim.aio.DLA(G, source, executor=executor))
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        (aio_path, aio_label), (aio_paths, aio_costs) = asyncio.run(solve(executor))
+    assert aio_label[0] == shortest_path_label[0]
+    assert aio_costs == costs
+
+def test_aio_process_pool_timeout_run():
+    # a timed out solve in a process pool frees its worker promptly as well
+    from benchmarks.generators import random_graph
+    G, source, target, max_res = random_graph(16, density=0.4, n_res=1, tightness=1.0, seed=0)
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, target, max_res)
+
+    async def solve(executor):
+        # start the worker first
+        await asyncio.get_running_loop().run_in_executor(executor, time.sleep, 0)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pylgrim.aio.GSSA(G_pre, source, target, max_res, res_min, executor=executor), timeout=0.1)
+        t0 = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(executor, time.sleep, 0)
+        return time.perf_counter() - t0
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        waited = asyncio.run(solve(executor))
+    print('worker process freed after {} s'.format(waited))
+    assert waited < 0.5
+
+def test_aio_timeout_run():
+    # a timed out solve frees its worker promptly
+    from benchmarks.generators import random_graph
+    G, source, target, max_res = random_graph(16, density=0.4, n_res=1, tightness=1.0, seed=0)
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, target, max_res)
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    async def solve():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pylgrim.aio.GSSA(G_pre, source, target, max_res, res_min, executor=executor), timeout=0.01)
+        t0 = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(executor, time.sleep, 0)
+        return time.perf_counter() - t0
+    waited = asyncio.run(solve())
+    print('worker freed after {} s'.format(waited))
+    assert waited < 0.5
+    executor.shutdown()
+
+def test_cancel_token_run():
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    G_view = pylgrim.tools.decoupled_view(G, source)
+    cancel = pylgrim.tools.CancelToken()
+    cancel.cancel()
+    with pytest.raises(pylgrim.tools.Cancelled):
+        pylgrim.ESPP.DLA(G_view, source, cancel=cancel)
+
+def test_exceptions_run():
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    max_res = list([1.0,1.0])
+
+    # the source is a child without decoupling
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, 6, max_res)
+    with pytest.raises(nx.NetworkXError):
+        pylgrim.ESPPRC.GSSA(G_pre, source, 6, max_res, res_min)
+    with pytest.raises(nx.NetworkXError):
+        pylgrim.ESPP.DLA(G, source)
+
+    # the target cannot be reached within the maximum resources
+    with pytest.raises(nx.NetworkXNoPath):
+        pylgrim.ESPPRC.preprocess(G, source, 6, list([0.1,0.1]))
+
+def test_exceptions_pruned_run():
+    # the target can be reached within each maximum resource separately, but the pruning removes the source
+    from benchmarks.generators import random_graph
+    G, source, target, max_res = random_graph(8, density=0.2, n_res=2, tightness=0.1, seed=252)
+    with pytest.raises(nx.NetworkXNoPath):
+        pylgrim.ESPPRC.preprocess(G, source, target, max_res)
+    with pytest.raises(nx.NetworkXNoPath):
+        pylgrim.ESPPRC.preprocess(pylgrim.compiled.CompiledGraph.from_networkx(G), source, target, max_res)
+    table = pylgrim.ESPPRC.setup_least_resource_paths_ESPPRC(G)
+    with pytest.raises(nx.NetworkXNoPath):
+        pylgrim.ESPPRC.prune_graph_with_table(G, source, target, max_res, table)
+
+    # and the labeling raises the same if it is given a graph without them
+    H = nx.DiGraph(n_res=2)
+    H.add_edge(source, 'other', weight=1.0, res_cost=[0.0, 0.0])
+    with pytest.raises(nx.NetworkXNoPath):
+        pylgrim.ESPPRC.GSSA(H, source, target, max_res, table)
+
+
+if __name__ == "__main__":
+    test_aio_run()
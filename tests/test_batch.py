@@ -0,0 +1,97 @@
+# test the batch solver of python -m pylgrim on the simple test graph, given in the different instance formats.
+import pylgrim
+import json
+import logging
+import tools as testtools
+
+# possible values are: WARNING, INFO, DEBUG, ...
+# (see https://docs.python.org/3/library/logging.html#logging-levels)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def _write_instances(directory):
+    """write the test graph as a CSV edge list, as JSON lines and as a preprocessed directory to {directory}"""
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    max_res = [1.0, 1.0]
+    with open(directory / 'graph.csv', 'w') as f:
+        f.write('source,target,weight,res_0,res_1\n')
+        for u, v, e in G.edges(data=True):
+            f.write('{},{},{},{},{}\n'.format(u, v, e['weight'], *e['res_cost']))
+    edges = [[u, v, e['weight'], e['res_cost'].tolist()] for u, v, e in G.edges(data=True)]
+    with open(directory / 'graphs.jsonl', 'w') as f:
+        f.write(json.dumps(dict(id='to 6', edges=edges)) + '\n')
+        f.write(json.dumps(dict(id='to 4', edges=edges, target=4)) + '\n')
+        f.write(json.dumps(dict(id='tight', edges=edges, max_res=[0.1, 0.1])) + '\n')
+    pylgrim.tools.decouple_source(G, 0, source_in='source_in')
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, 0, 6, max_res)
+    pylgrim.tables.save_preprocessed(directory / 'preprocessed', G_pre, res_min)
+    return [str(directory / name) for name in ('graph.csv', 'graphs.jsonl', 'preprocessed')]
+
+def test_batch_run(tmp_path):
+    instances = _write_instances(tmp_path)
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    pylgrim.tools.decouple_source(G, 0, source_in='source_in')
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, 0, 6, [1.0, 1.0])
+    path, label = pylgrim.ESPPRC.GSSA(G_pre, 0, 6, [1.0, 1.0], res_min)
+
+    # in this process and in a pool of workers, to which the instances are submitted one at a time
+    for workers in ('1', '2'):
+        output = tmp_path / 'results_{}.jsonl'.format(workers)
+        assert pylgrim.batch.main(instances + ['--source', '0', '--target', '6', '--max-res', '1.0', '--workers', workers, '--max-pending', '1', '--output', str(output)]) == 0
+        results = {result['instance']: result for result in map(json.loads, open(output))}
+        print('results with {} workers: {}'.format(workers, results))
+        assert len(results) == 5
+        for name in (instances[0], 'to 6', instances[2]):
+            assert results[name]['status'] == 'ok'
+            assert results[name]['cost'] == label[0]
+            assert results[name]['path'] == [path.source] + [v for _, v, _ in path]
+            assert results[name]['seconds']['total'] >= results[name]['seconds']['solve']
+        assert results['to 4']['path'][-1] == 4
+        assert results['tight']['status'] == 'infeasible'
+
+    # the cheapest paths to all nodes
+    output = tmp_path / 'results_DLA.jsonl'
+    assert pylgrim.batch.main([instances[0], '--solver', 'DLA', '--source', '0', '--workers', '1', '--output', str(output)]) == 0
+    result = json.loads(open(output).readline())
+    paths, costs = pylgrim.ESPP.DLA(G, 0)
+    assert result['costs'] == {str(n): costs[n][0] for n in costs}
+
+    # errors are reported per instance
+    output = tmp_path / 'results_error.jsonl'
+    assert pylgrim.batch.main([instances[0], '--target', '6', '--workers', '1', '--output', str(output)]) == 1
+    assert json.loads(open(output).readline())['status'] == 'error'
+
+def test_batch_source_in_edges_run(tmp_path):
+    # the in-edges of the source lead to source_in, which gives the cheapest tour back to the source
+    instances = _write_instances(tmp_path)
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    assert G.in_degree(0) > 0
+    pylgrim.tools.decouple_source(G, 0, source_in='source_in')
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, 0, 'source_in', [1.0, 1.0])
+    path, label = pylgrim.ESPPRC.GSSA(G_pre, 0, 'source_in', [1.0, 1.0], res_min)
+
+    output = tmp_path / 'results_tour.jsonl'
+    assert pylgrim.batch.main(instances[0:1] + ['--source', '0', '--target', 'source_in', '--max-res', '1.0', '--workers', '1', '--output', str(output)]) == 0
+    result = json.loads(open(output).readline())
+    print('cheapest tour: {}'.format(result))
+    assert result['status'] == 'ok'
+    assert result['cost'] == label[0]
+    assert result['path'] == [0] + [v for _, v, _ in path]
+    assert result['path'][-1] == 'source_in'
+
+    # a node called source_in cannot be told apart from the decoupled source
+    edges = [[0, 1, -1.0, [0.1]], [1, 'source_in', -1.0, [0.1]]]
+    with open(tmp_path / 'clash.jsonl', 'w') as f:
+        f.write(json.dumps(dict(id='clash', edges=edges)) + '\n')
+    output = tmp_path / 'results_clash.jsonl'
+    assert pylgrim.batch.main([str(tmp_path / 'clash.jsonl'), '--source', '0', '--target', '1', '--max-res', '1.0', '--workers', '1', '--output', str(output)]) == 1
+    assert json.loads(open(output).readline())['status'] == 'error'
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        test_batch_run(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_batch_source_in_edges_run(pathlib.Path(directory))
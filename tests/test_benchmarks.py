@@ -0,0 +1,37 @@
+# test the benchmark instance generators and a small benchmark sweep.
+import json
+import networkx as nx
+import numpy as np
+from benchmarks import bench_solvers, generators
+
+def test_generators_run():
+    for name, generator in generators.GENERATORS.items():
+        G, source, target, max_res = generator(12, density=0.4, n_res=2, tightness=0.5, seed=3)
+        G2, source2, target2, max_res2 = generator(12, density=0.4, n_res=2, tightness=0.5, seed=3)
+        print('{}: {} nodes, {} edges'.format(name, G.number_of_nodes(), G.number_of_edges()))
+
+        # reproducible
+        assert (source, target) == (source2, target2)
+        assert np.all(max_res == max_res2)
+        assert sorted(G.edges(), key=str) == sorted(G2.edges(), key=str)
+        for u, v in G.edges():
+            assert G[u][v]['weight'] == G2[u][v]['weight']
+            assert np.all(G[u][v]['res_cost'] == G2[u][v]['res_cost'])
+
+        # ready to be solved
+        assert G.graph['n_res'] == 2 and len(max_res) == 2
+        assert G.in_degree(source) == 0
+        assert nx.has_path(G, source, target)
+
+def test_bench_solvers_run(tmp_path):
+    output = tmp_path / 'bench.jsonl'
+    bench_solvers.main(['--nodes', '8', '--n-res', '1', '--tightness', '0.5', '--output', str(output)])
+    results = [json.loads(line) for line in open(output)]
+    assert len(results) == len(generators.GENERATORS) * len(bench_solvers.SOLVERS)
+    for result in results:
+        assert result['seconds'] >= 0.0
+        assert result['solver'] in bench_solvers.SOLVERS
+
+
+if __name__ == "__main__":
+    test_generators_run()
@@ -0,0 +1,31 @@
+# test that importing pylgrim is fast and free of side effects.
+import logging
+import os
+import subprocess
+import sys
+
+def _run(code):
+    """Run {code} in a fresh interpreter that can import pylgrim and return its output."""
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = root + os.pathsep + env.get('PYTHONPATH', '')
+    return subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout.split()
+
+def test_import_lazy():
+    # importing the package does not import the heavy dependencies
+    out = _run('import sys, pylgrim; print("networkx" in sys.modules, "numpy" in sys.modules)')
+    assert out == ['False', 'False']
+
+    # accessing a submodule imports it
+    out = _run('import sys, pylgrim; pylgrim.ESPPRC; print("networkx" in sys.modules, "ESPPRC" in dir(pylgrim))')
+    assert out == ['True', 'True']
+
+def test_import_no_logging_config():
+    # importing the solvers does not configure logging
+    out = _run('import logging, pylgrim.ESPP, pylgrim.ESPPRC; print(len(logging.getLogger().handlers), logging.getLogger().level)')
+    assert out == ['0', str(logging.WARNING)]
+
+
+if __name__ == "__main__":
+    test_import_lazy()
+    test_import_no_logging_config()
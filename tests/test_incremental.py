@@ -0,0 +1,97 @@
+# test incremental preprocessing on the simple test graph.
+import pylgrim
+import logging
+import networkx as nx
+import numpy as np
+import pytest
+import tools as testtools
+
+# possible values are: WARNING, INFO, DEBUG, ...
+# (see https://docs.python.org/3/library/logging.html#logging-levels)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def test_incremental_preprocess_run():
+    # create test graph
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    pylgrim.tools.decouple_source(G, source, source_in=source_in)
+    target = 6
+    max_res = list([0.5,1.0])
+    inc = pylgrim.incremental.IncrementalPreprocess(G, source, target, max_res)
+
+    # close an edge, add a new node and edge, and change the resources of another edge
+    changes = [
+        (2, 5, None),
+        (2, 'new', dict(weight=-1, res_cost=np.array([0.1,0.1]))),
+        ('new', 6, dict(weight=-1, res_cost=np.array([0.1,0.1]))),
+        (1, 4, dict(res_cost=np.array([0.1,0.1]))),
+    ]
+    for i in range(0,len(changes)+1):
+        if i > 0:
+            H, res_min = inc.update(changes[i-1:i])
+        else:
+            H, res_min = inc.H, inc.res_min
+
+        # compare with preprocessing from scratch
+        H_full = pylgrim.ESPPRC.prune_graph(G, source, target, max_res)
+        table = pylgrim.ESPPRC.setup_least_resource_paths_ESPPRC(G)
+        assert set(H.edges()) == set(H_full.edges())
+        assert set(H.nodes()) == set(H_full.nodes())
+        for res in range(0,G.graph['n_res']):
+            for u in G.nodes():
+                assert inc.table[res][u].keys() == table[res][u].keys()
+                for v in table[res][u]:
+                    assert np.isclose(inc.table[res][u][v], table[res][u][v])
+
+        inc_path, inc_label = pylgrim.ESPPRC.GSSA(H, source, target, max_res, res_min)
+        H_pre, res_min_pre = pylgrim.ESPPRC.preprocess(G, source, target, max_res)
+        pre_path, pre_label = pylgrim.ESPPRC.GSSA(H_pre, source, target, max_res, res_min_pre)
+        print('after {} changes: shortest path {} with label {}'.format(i, inc_path, inc_label))
+        assert np.isclose(inc_label[0], pre_label[0])
+
+def test_incremental_preprocess_no_path_run():
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    pylgrim.tools.decouple_source(G, source, source_in='source_in')
+    target = 6
+    max_res = list([0.5,1.0])
+    inc = pylgrim.incremental.IncrementalPreprocess(G, source, target, max_res)
+
+    # make the target unreachable: the pruned graph is left empty
+    edges_in = [(u, target, dict(G[u][target])) for u in list(G.pred[target])]
+    with pytest.raises(nx.NetworkXNoPath):
+        inc.update([(u, target, None) for u, _, _ in edges_in])
+    assert inc.H.number_of_nodes() == 0
+    assert len(inc.res_min.nodes) == 0
+
+    # and reachable again: the result is the same as preprocessing from scratch
+    H, res_min = inc.update(edges_in)
+    H_full = pylgrim.ESPPRC.prune_graph(G, source, target, max_res)
+    assert set(H.edges()) == set(H_full.edges())
+    assert set(res_min.nodes) == set(H_full.nodes())
+
+def test_incremental_preprocess_shared_run():
+    # the table returned by update shares its array with the table of the whole graph, so that later updates change it
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    pylgrim.tools.decouple_source(G, source, source_in='source_in')
+    target = 6
+    max_res = list([0.5,1.0])
+    inc = pylgrim.incremental.IncrementalPreprocess(G, source, target, max_res)
+    H, res_min = inc.update([(1, 4, dict(res_cost=np.array([0.2,0.2])))])
+    assert res_min.dist is inc.table.dist
+    before = res_min[0][1][4]
+    kept = res_min.dist.copy()
+
+    inc.update([(1, 4, dict(res_cost=np.array([0.1,0.1])))])
+    assert res_min[0][1][4] == inc.res_min[0][1][4] == 0.1
+    assert res_min[0][1][4] < before
+    assert kept[0, res_min.index[1], res_min.index[4]] == before
+
+
+if __name__ == "__main__":
+    test_incremental_preprocess_run()
+    test_incremental_preprocess_no_path_run()
+    test_incremental_preprocess_shared_run()
@@ -0,0 +1,101 @@
+# test the compact label store and solving with it on the simple test graph.
+import pylgrim
+import logging
+import numpy as np
+import tools as testtools
+
+# possible values are: WARNING, INFO, DEBUG, ...
+# (see https://docs.python.org/3/library/logging.html#logging-levels)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def test_label_store_run():
+    store = pylgrim.labels.LabelStore(2, 70)
+    bits_0 = store.pack(np.zeros(70))
+    slot_a = store.add('a', 0.0, np.zeros(2), bits_0)
+    slot_b = store.add('b', 1.0, np.array([1.0, 2.0]), store.with_bit(bits_0, 65), parent=('a', slot_a))
+
+    # node resources beyond the first 64 are packed in a second word
+    assert store.has_bit(store.get('b', slot_b)['bits'], 65)
+    assert store.label('b', slot_b)[1][2+65] == 1.0
+    assert store.path('b', slot_b) == ['a', 'b']
+
+    # dominance
+    bits_b = store.get('b', slot_b)['bits']
+    assert store.is_dominated('b', 2.0, np.array([1.0, 2.0]), bits_b)
+    assert not store.is_dominated('b', 1.0, np.array([1.0, 2.0]), bits_b)
+    assert not store.is_dominated('b', 2.0, np.array([1.0, 2.0]), bits_0)
+    assert store.remove_dominated('b', 0.5, np.array([1.0, 1.0]), bits_0) == [slot_b]
+    assert store.slots('b') == []
+    assert store.n_alive == 1
+
+    # the arenas grow geometrically
+    for i in range(0,100):
+        store.add('c', float(i), np.array([i, i]), bits_0)
+    assert len(store.arenas[store.node_ids['c']]) == 128
+
+def test_label_store_predecessor_run():
+    # with 2-cycle elimination, a label is only dominated by a label with the same predecessor or by labels with two different predecessors
+    store = pylgrim.labels.LabelStore(1, 1)
+    bits_0 = store.pack(np.zeros(1))
+    for u in ('a', 'b', 'c'):
+        store.add(u, 0.0, np.zeros(1), bits_0)
+    store.add('v', 1.0, np.array([1.0]), bits_0, parent=('a', 0))
+    assert store.is_dominated('v', 2.0, np.array([1.0]), bits_0)
+    assert store.is_dominated('v', 2.0, np.array([1.0]), bits_0, pred='a')
+    assert not store.is_dominated('v', 2.0, np.array([1.0]), bits_0, pred='b')
+    store.add('v', 1.5, np.array([1.0]), bits_0, parent=('c', 0))
+    assert store.is_dominated('v', 2.0, np.array([1.0]), bits_0, pred='b')
+
+    # and only removes the labels with the same predecessor
+    assert store.remove_dominated('v', 0.5, np.array([0.5]), bits_0, pred='c') == [1]
+    assert store.slots('v') == [0]
+
+def test_label_store_index_run():
+    # the labels that are alive are indexed in order of their first resource
+    store = pylgrim.labels.LabelStore(2, 1)
+    bits_0 = store.pack(np.zeros(1))
+    rng = np.random.default_rng(0)
+    for i in range(0,200):
+        res = rng.random(2)
+        cost = -res.sum() + rng.random()
+        if not store.is_dominated('v', cost, res, bits_0):
+            store.remove_dominated('v', cost, res, bits_0)
+            store.add('v', cost, res, bits_0)
+    node_id = store.node_ids['v']
+    n = store.index_sizes[node_id]
+    index_slots = store.indices[node_id][1][:n]
+    assert sorted(index_slots.tolist()) == store.slots('v')
+    keys = [store.get('v', slot)['res'][0] for slot in index_slots]
+    assert keys == sorted(keys)
+    
+    # no label that is alive dominates another one
+    for slot in store.slots('v'):
+        label = store.get('v', slot)
+        assert not store.is_dominated('v', label['cost'], label['res'], label['bits'])
+
+def test_label_store_float32_run():
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    G_view = pylgrim.tools.decoupled_view(G, source, source_in=source_in)
+    max_res = list([1.0,1.0])
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G_view, source, source_in, max_res)
+
+    stats_64 = pylgrim.stats.SolverStats()
+    path_64, label_64 = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min, stats=stats_64)
+    stats_32 = pylgrim.stats.SolverStats()
+    path_32, label_32 = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min, stats=stats_32, res_dtype=np.float32)
+    print('shortest path found: {} with label {} and {}'.format(path_64, label_64, label_32))
+
+    # the path that uses all resources is still found, as the resources are rounded down
+    assert label_32[0] == label_64[0]
+    assert np.allclose(label_32[1], label_64[1])
+    assert stats_32.peak_label_bytes < stats_64.peak_label_bytes
+
+
+if __name__ == "__main__":
+    test_label_store_run()
+    test_label_store_predecessor_run()
+    test_label_store_index_run()
+    test_label_store_float32_run()
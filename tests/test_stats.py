@@ -0,0 +1,51 @@
+# test the solver statistics on the simple test graph.
+import pylgrim
+import logging
+import tools as testtools
+from pylgrim.stats import SolverStats
+
+# possible values are: WARNING, INFO, DEBUG, ...
+# (see https://docs.python.org/3/library/logging.html#logging-levels)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def test_stats_ESPPRC_run():
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    G_view = pylgrim.tools.decoupled_view(G, source, source_in=source_in)
+
+    # record which solvers finished through the callback
+    finished = list()
+    stats = SolverStats(callback=lambda solver, s: finished.append(solver))
+
+    max_res = list([1.0,1.0])
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G_view, source, source_in, max_res, stats=stats)
+    shortest_path, shortest_path_label = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min, stats=stats)
+    print(stats)
+
+    assert finished[0] == 'preprocess' and finished[-1] == 'GSSA'
+    assert finished.count('GLSA') == stats.gssa_rounds
+    assert len(stats.S) == stats.gssa_rounds - 1
+    assert stats.labels_created > 0 and stats.peak_labels > 0 and stats.peak_label_bytes > 0
+    assert stats.max_open > 0
+    for phase in ('prune', 'least_resource', 'labeling', 'preprocess', 'GSSA'):
+        assert stats.times[phase] >= 0.0
+
+def test_stats_ESPP_run():
+    G = testtools.create_test_graph(add_nodes_to_0=False)
+    source = 0
+
+    stats = SolverStats()
+    paths, costs = pylgrim.ESPP.DLA(G, source, stats=stats)
+    print(stats)
+
+    assert stats.dla_rounds >= 1
+    assert stats.K == {n: len(costs[n]) for n in G.nodes()}
+    assert stats.labels_created > 0 and stats.peak_labels > 0
+    assert stats.as_dict()['times']['labeling'] <= stats.times['DLA']
+
+
+if __name__ == "__main__":
+    test_stats_ESPPRC_run()
+    test_stats_ESPP_run()
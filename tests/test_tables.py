@@ -0,0 +1,87 @@
+# test the least resource tables and the on-disk cache of preprocessing results on the simple test graph.
+import pylgrim
+import logging
+import networkx as nx
+import numpy as np
+import pytest
+import tools as testtools
+
+# possible values are: WARNING, INFO, DEBUG, ...
+# (see https://docs.python.org/3/library/logging.html#logging-levels)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def test_least_resource_table_run():
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    res_min = pylgrim.ESPPRC.setup_least_resource_paths_ESPPRC(G)
+
+    # the table behaves as the dictionaries of all_pairs_dijkstra_path_length
+    assert len(res_min) == G.graph['n_res']
+    for res in range(0,G.graph['n_res']):
+        lengths = dict(nx.all_pairs_dijkstra_path_length(G, weight=lambda u, v, e: e['res_cost'][res]))
+        for u in G.nodes():
+            assert dict(res_min[res][u]) == lengths[u]
+            assert res_min[res][u].get('not a node', 0.0) == 0.0
+
+    # nodes can be added to the full table, also without resources, but not to a restricted one
+    res_min.add_node('new')
+    assert res_min[0]['new'] == {'new': 0.0}
+    assert 'new' not in res_min[0][0]
+    with pytest.raises(ValueError):
+        res_min.restrict([0, 1]).add_node('other')
+    table = pylgrim.tables.LeastResourceTable(np.zeros((0, 0, 0)), [])
+    for n in range(0,5):
+        table.add_node(n)
+    assert table.nodes == list(range(0,5))
+
+def test_save_load_preprocessed_run(tmp_path):
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    G_view = pylgrim.tools.decoupled_view(G, source, source_in=source_in)
+    max_res = list([1.0,1.0])
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G_view, source, source_in, max_res)
+    shortest_path, shortest_path_label = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min)
+
+    # save and load again, memory-mapped
+    pylgrim.tables.save_preprocessed(tmp_path / 'cache', G_pre, res_min)
+    G_load, res_min_load = pylgrim.tables.load_preprocessed(tmp_path / 'cache')
+    assert isinstance(G_load, pylgrim.compiled.CompiledGraph)
+    assert isinstance(G_load.res, np.memmap) and isinstance(res_min_load.dist, np.memmap)
+    assert set(G_load.to_networkx().edges()) == set(G_pre.edges())
+    for u in G_pre.nodes():
+        for v in G_pre.nodes():
+            assert res_min_load[0][u].get(v) == res_min[0][u].get(v)
+
+    load_path, load_label = pylgrim.ESPPRC.GSSA(G_load, source, source_in, max_res, res_min_load)
+    print('shortest path found: {} with label {}'.format(load_path, load_label))
+    assert load_path == shortest_path
+    assert load_label[0] == shortest_path_label[0]
+
+def test_save_load_preprocessed_compiled_run(tmp_path):
+    # a graph set up from arrays is preprocessed, saved and loaded as a CompiledGraph
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    G_view = pylgrim.tools.decoupled_view(G, source, source_in=source_in)
+    G_compiled = pylgrim.compiled.CompiledGraph.from_networkx(G_view)
+    max_res = list([1.0,1.0])
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G_compiled, source, source_in, max_res)
+    shortest_path, shortest_path_label = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min)
+
+    pylgrim.tables.save_preprocessed(tmp_path / 'cache', G_pre, res_min)
+    G_load, res_min_load = pylgrim.tables.load_preprocessed(tmp_path / 'cache')
+    assert isinstance(G_load.heads, np.memmap)
+    assert G_load.nodes == G_pre.nodes
+    for name in ('indptr', 'heads', 'weight', 'res'):
+        assert np.array_equal(getattr(G_load, name), getattr(G_pre, name))
+    assert np.array_equal(res_min_load.dist, res_min.dist[:, res_min.positions(G_pre.nodes)][:, :, res_min.positions(G_pre.nodes)])
+
+    load_path, load_label = pylgrim.ESPPRC.GSSA(G_load, source, source_in, max_res, res_min_load)
+    print('shortest path found: {} with label {}'.format(load_path, load_label))
+    assert load_path == shortest_path
+    assert load_label[0] == shortest_path_label[0]
+
+
+if __name__ == "__main__":
+    test_least_resource_table_run()
@@ -0,0 +1,47 @@
+# test the pylgrim tools on the simple test graph.
+import pylgrim
+import logging
+import tools as testtools
+
+# possible values are: WARNING, INFO, DEBUG, ...
+# (see https://docs.python.org/3/library/logging.html#logging-levels)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def test_decoupled_view_run():
+    # create test graph
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    source_in = 'source_in'
+    edges = sorted(G.edges())
+
+    # decoupled view leaves the graph untouched
+    G_view = pylgrim.tools.decoupled_view(G, source, source_in=source_in)
+    assert sorted(G.edges()) == edges
+    assert len(G_view.pred[source]) == 0
+    assert set(G_view.pred[source_in]) == {1, 6}
+    assert G_view.has_edge(1, source_in) and not G_view.has_edge(1, source)
+    assert G_view[1][source_in] is G[1][source]
+
+    # solve with the view and with the decoupled graph itself
+    max_res = list([1.0,1.0])
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G_view, source, source_in, max_res)
+    view_path, view_label = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min)
+    view_paths, view_costs = pylgrim.ESPP.DLA(G_view, source)
+
+    pylgrim.tools.decouple_source(G, source, source_in=source_in)
+    assert set(G.edges()) == set(G_view.edges())
+    G_pre, res_min = pylgrim.ESPPRC.preprocess(G, source, source_in, max_res)
+    shortest_path, shortest_path_label = pylgrim.ESPPRC.GSSA(G_pre, source, source_in, max_res, res_min)
+    paths, costs = pylgrim.ESPP.DLA(G, source)
+    pylgrim.tools.undecouple_source(G, source, source_in=source_in)
+
+    print('shortest path found: {} with label {}'.format(view_path, view_label))
+    assert view_path == shortest_path
+    assert view_label[0] == shortest_path_label[0]
+    assert view_costs == costs
+    assert sorted(G.edges()) == edges
+
+
+if __name__ == "__main__":
+    test_decoupled_view_run()
@@ -0,0 +1,72 @@
+# test the shared-prefix path storage of DLA.
+import pylgrim
+import logging
+import tools as testtools
+
+# possible values are: WARNING, INFO, DEBUG, ...
+# (see https://docs.python.org/3/library/logging.html#logging-levels)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def test_path_trie_run():
+    trie = pylgrim.trie.PathTrie()
+    root = trie.root('s')
+    a = trie.extend(root, 'a')
+    ab = trie.extend(a, 'b')
+    ac = trie.extend(a, 'c')
+    assert trie.nodes(ab) == ['s', 'a', 'b']
+    assert trie.contains(ab, 'a') and not trie.contains(ab, 'c') and not trie.contains(ab, 'x')
+
+    # equal paths have equal entries, and the paths share their prefix
+    assert trie.find(a, 'b') == ab
+    assert trie.find(a, 'd') is None
+    assert trie.extend_nodes(root, ['a', 'b']) == ab
+    assert len(trie) == 4
+
+    # entries are freed when they are no longer held, and their slots are reused
+    trie.release(a)
+    trie.release(ab)
+    trie.release(ab)
+    assert len(trie) == 3
+    assert trie.nodes(ac) == ['s', 'a', 'c']
+    trie.release(ac)
+    assert len(trie) == 1
+    assert trie.extend(root, 'd') in (a, ab, ac)
+    assert trie.nbytes > 0
+
+def test_path_trie_DLA_run():
+    # the paths returned by DLA are complete and elementary
+    G = testtools.create_test_graph(add_nodes_to_0=True)
+    source = 0
+    pylgrim.tools.decouple_source(G, source, source_in='source_in')
+    for min_K in (1, 3):
+        stats = pylgrim.stats.SolverStats()
+        paths, costs = pylgrim.ESPP.DLA(G, source, min_K=min_K, stats=stats)
+        for node in paths:
+            for path, cost in zip(paths[node], costs[node]):
+                nodes = [path.source] + [v for _, v, _ in path]
+                assert nodes[0] == source and nodes[-1] == node
+                assert len(set(nodes)) == len(nodes)
+                assert sum(e['weight'] for _, _, e in path) == cost
+        assert stats.peak_label_bytes > 0
+
+def test_path_trie_large_run():
+    # on a long chain, the bits of an entry grow up to one bit per node of the graph, but not beyond
+    import sys
+    import networkx as nx
+    n_nodes = 1000
+    G = nx.DiGraph(n_res=1)
+    for i in range(0,n_nodes-1):
+        G.add_edge(i, i+1, weight=-1.0)
+    stats = pylgrim.stats.SolverStats()
+    paths, costs = pylgrim.ESPP.DLA(G, 0, stats=stats)
+    assert costs[n_nodes-1][0] == -(n_nodes-1.0)
+    assert len(paths[n_nodes-1][0]) == n_nodes
+    entry_bytes = pylgrim.trie._ENTRY_BYTES + sys.getsizeof(1 << (n_nodes-1))
+    assert stats.peak_labels * pylgrim.trie._ENTRY_BYTES < stats.peak_label_bytes <= stats.peak_labels * entry_bytes
+
+
+if __name__ == "__main__":
+    test_path_trie_run()
+    test_path_trie_DLA_run()
+    test_path_trie_large_run()